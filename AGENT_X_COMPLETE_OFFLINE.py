@@ -9,12 +9,78 @@ import pandas as pd
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
+matplotlib.rcParams['path.simplify'] = True
+matplotlib.rcParams['path.simplify_threshold'] = 1.0
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from matplotlib.patches import Rectangle
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.colors import to_rgba_array
+from PIL import Image
 from datetime import datetime, timedelta
 import os
 
+# Optional JIT: fall back to the vectorized NumPy kernel without numba
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# === NUMERIC KERNELS (Francesco's Mirror Method) ===
+@njit(cache=True, fastmath=True)
+def _gen_nq_kernel(base_price, theft_per_candle, hist_count, noise_z, high_z, low_z):
+    """Fused single-pass OHLC kernel (compiled by numba)"""
+    n = noise_z.shape[0]
+    open_ = np.empty(n)
+    high = np.empty(n)
+    low = np.empty(n)
+    close = np.empty(n)
+    true_close = np.empty(n)
+    theft = np.empty(n)
+    
+    last_close = base_price
+    for i in range(n):
+        wave = np.sin(i / 60 * 2 * np.pi) * 50  # Hourly oscillation
+        trend = i / 360 * 100  # Uptrend throughout day
+        tc = base_price + wave + trend + noise_z[i] * 8
+        t = theft_per_candle if i >= hist_count else 0.0
+        
+        open_[i] = last_close
+        high[i] = tc + abs(high_z[i] * 12) + t
+        low[i] = tc - abs(low_z[i] * 12) + t
+        close[i] = tc + t
+        true_close[i] = tc
+        theft[i] = t
+        last_close = close[i]
+    
+    return open_, high, low, close, true_close, theft
+
+def _gen_nq_numpy(base_price, theft_per_candle, hist_count, noise_z, high_z, low_z):
+    """Vectorized NumPy equivalent of _gen_nq_kernel"""
+    n = noise_z.shape[0]
+    minutes = np.arange(n, dtype=np.float64)  # freq is 1min
+    
+    wave = np.sin(minutes / 60 * 2 * np.pi) * 50  # Hourly oscillation
+    trend = minutes / 360 * 100  # Uptrend throughout day
+    
+    # TRUE MARKET (before theft)
+    true_close = base_price + wave + trend + noise_z * 8
+    theft = np.where(minutes >= hist_count, theft_per_candle, 0.0)
+    
+    close = true_close + theft
+    open_ = np.roll(close, 1)
+    open_[0] = base_price
+    high = true_close + np.abs(high_z * 12) + theft
+    low = true_close - np.abs(low_z * 12) + theft
+    
+    return open_, high, low, close, true_close, theft
+
 # === EMBEDDED DATA GENERATOR (Francesco's Algorithm) ===
 def generate_internal_nq_data():
     """
@@ -41,69 +107,49 @@ def generate_internal_nq_data():
     # Francesco's Algorithm Parameters
     THEFT_PER_CANDLE = -85.32  # Systematic offset
     
-    data = []
-    last_close = base_price
+    # Historical: actual data (already happened)
+    # Predicted: apply Francesco's theft offset
+    n = len(timeline)
+    is_pred = np.asarray(timeline > current_time)
+    # Timeline is sorted, so history is a prefix: remember where "now" is
+    hist_count = int(np.count_nonzero(~is_pred))
     
-    for i, time in enumerate(timeline):
-        minutes = (time - today).total_seconds() / 60
-        
-        # Market dynamics (Francesco's Mirror Method)
-        wave = np.sin(minutes / 60 * 2 * np.pi) * 50  # Hourly oscillation
-        trend = minutes / 360 * 100  # Uptrend throughout day
-        noise = np.random.randn() * 8
-        
-        # TRUE MARKET (before theft)
-        true_close = base_price + wave + trend + noise
-        true_high = true_close + abs(np.random.randn() * 12)
-        true_low = true_close - abs(np.random.randn() * 12)
-        
-        # Determine if historical or predicted
-        is_historical = time <= current_time
-        
-        if is_historical:
-            # Historical: Actual data (already happened)
-            actual_open = last_close
-            actual_high = true_high
-            actual_low = true_low
-            actual_close = true_close
-            theft = 0
-            is_pred = False
-        else:
-            # Predicted: Apply Francesco's theft offset
-            theft = THEFT_PER_CANDLE
-            actual_open = last_close
-            actual_high = true_high + theft
-            actual_low = true_low + theft
-            actual_close = true_close + theft
-            is_pred = True
-        
-        data.append({
-            'time': time,
-            'open': actual_open,
-            'high': actual_high,
-            'low': actual_low,
-            'close': actual_close,
-            'true_close': true_close,
-            'theft': theft,
-            'is_prediction': is_pred
-        })
-        
-        last_close = actual_close
+    # One batched PCG64 draw for noise / high / low offsets
+    rng = np.random.default_rng()
+    noise_z, high_z, low_z = rng.standard_normal((3, n))
     
-    df = pd.DataFrame(data)
+    kernel = _gen_nq_kernel if HAVE_NUMBA else _gen_nq_numpy
+    open_, high, low, close, true_close, theft = kernel(
+        float(base_price), THEFT_PER_CANDLE, hist_count, noise_z, high_z, low_z
+    )
     
-    hist_count = len(df[~df['is_prediction']])
-    pred_count = len(df[df['is_prediction']])
+    df = pd.DataFrame({
+        'time': timeline,
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'true_close': true_close,
+        'theft': theft,
+        'is_prediction': is_pred
+    })
+    
+    pred_count = n - hist_count
+    df.attrs['split_idx'] = hist_count - 1
     
     print(f"✅ Generated {len(df)} candles (INTERNAL ONLY)")
     print(f"   Historical (10:00-11:30): {hist_count} candles")
     print(f"   Predicted (11:30-16:00): {pred_count} candles")
-    print(f"\n📍 Current Price: ${df[~df['is_prediction']]['close'].iloc[-1]:.2f}")
+    print(f"\n📍 Current Price: ${df['close'].iat[df.attrs['split_idx']]:.2f}")
     print(f"🔮 4 PM Predicted: ${df['close'].iloc[-1]:.2f}")
     
     return df
 
 # === MOBILE-OPTIMIZED CHART GENERATOR ===
+# RGBA by (is_prediction << 1) | down: hist up/down, predicted up/down
+CANDLE_PALETTE = to_rgba_array(['#00ff00', '#ff0000', '#00aaff', '#aa00ff'])
+CANDLE_PALETTE[2:, 3] = 0.7
+
 def create_surveillance_proof_chart(df, output_dir='.'):
     """
     Create mobile-ready candlestick chart
@@ -121,34 +167,32 @@ def create_surveillance_proof_chart(df, output_dir='.'):
     time_diff = (df['time'].iloc[1] - df['time'].iloc[0]).total_seconds() / 86400
     width = time_diff * 0.6
     
-    # Draw candles
-    for idx, row in df.iterrows():
-        t = mdates.date2num(row['time'])
-        o, h, l, c = row['open'], row['high'], row['low'], row['close']
-        is_pred = row['is_prediction']
-        
-        # Colors: Historical=Green/Red, Predicted=Blue/Purple
-        if is_pred:
-            color = '#00aaff' if c >= o else '#aa00ff'
-            alpha = 0.7
-        else:
-            color = '#00ff00' if c >= o else '#ff0000'
-            alpha = 1.0
-        
-        # Draw wick
-        ax.plot([t, t], [l, h], color=color, linewidth=1, alpha=alpha)
-        
-        # Draw body
-        body_h = abs(c - o)
-        body_b = min(o, c)
-        rect = Rectangle((t - width/2, body_b), width, body_h, 
-                         facecolor=color, edgecolor=color, alpha=alpha, linewidth=0.5)
-        ax.add_patch(rect)
+    # Candle arrays (one pass over the frame, no per-row artists)
+    t = mdates.date2num(df['time'])
+    o, h, l, c = df[['open', 'high', 'low', 'close']].to_numpy().T
+    is_pred = df['is_prediction'].to_numpy()
+    
+    # Colors: Historical=Green/Red, Predicted=Blue/Purple (2-bit palette index)
+    idx = (is_pred.astype(np.uint8) << 1) | (c < o).astype(np.uint8)
+    rgba = CANDLE_PALETTE[idx]
+    
+    # Draw wicks
+    segs = np.stack([np.column_stack([t, l]), np.column_stack([t, h])], axis=1)
+    ax.add_collection(LineCollection(segs, colors=rgba, linewidths=1))
+    
+    # Draw bodies
+    body_b = np.minimum(o, c)
+    body_h = np.abs(c - o)
+    bodies = [Rectangle((ti - width/2, bi), width, hi)
+              for ti, bi, hi in zip(t, body_b, body_h)]
+    ax.add_collection(PatchCollection(bodies, facecolors=rgba, edgecolors=rgba,
+                                      linewidths=0.5, match_original=False))
+    ax.autoscale_view()
     
     # NOW line
-    current_idx = df[~df['is_prediction']].index[-1]
-    current_t = mdates.date2num(df.loc[current_idx, 'time'])
-    current_str = df.loc[current_idx, 'time'].strftime('%H:%M')
+    current_idx = df.attrs['split_idx']
+    current_t = t[current_idx]
+    current_str = df['time'].iat[current_idx].strftime('%H:%M')
     ax.axvline(x=current_t, color='yellow', linestyle='--', linewidth=2, 
                label=f'NOW ({current_str})', alpha=0.8)
     
@@ -177,17 +221,21 @@ def create_surveillance_proof_chart(df, output_dir='.'):
     ax.legend(handles=legend, loc='upper left', facecolor='#2a2a2a', 
               edgecolor='white', labelcolor='white', fontsize=9)
     
-    plt.tight_layout()
+    # Fixed margins for the known 16:9 figure (no tight layout/bbox pass)
+    fig.subplots_adjust(left=0.06, right=0.98, top=0.92, bottom=0.12)
     
     # Save both versions
     chart_std = os.path.join(output_dir, 'FRANCESCO_FULL_DAY_CHART.png')
     chart_mobile = os.path.join(output_dir, 'FRANCESCO_FULL_DAY_MOBILE.png')
     
-    plt.savefig(chart_std, dpi=150, facecolor='#0e0e0e', bbox_inches='tight')
-    plt.savefig(chart_mobile, dpi=300, facecolor='#0e0e0e', bbox_inches='tight')
-    
+    # Rasterize once at mobile resolution, downsample for the standard chart
+    plt.savefig(chart_mobile, dpi=300, facecolor='#0e0e0e')
     plt.close()
     
+    with Image.open(chart_mobile) as img:
+        w, h = img.size
+        img.resize((w // 2, h // 2), Image.LANCZOS).save(chart_std, optimize=True)
+    
     print(f"✅ Standard: {chart_std}")
     print(f"✅ Mobile: {chart_mobile}")
     
@@ -207,9 +255,16 @@ def main():
     # Generate internal data
     df = generate_internal_nq_data()
     
-    # Save data
-    data_file = 'francesco_full_day_internal.csv'
-    df.to_csv(data_file, index=False)
+    # Save data (columnar Parquet when pyarrow is available)
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        data_file = 'francesco_full_day_internal.parquet'
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), data_file,
+                       compression='zstd')
+    except ImportError:
+        data_file = 'francesco_full_day_internal.csv'
+        df.to_csv(data_file, index=False)
     print(f"\n💾 Data: {data_file}")
     
     # Create charts
@@ -217,7 +272,8 @@ def main():
     
     # Show next predictions
     print("\n🔮 NEXT 10 PREDICTIONS (Francesco's Algorithm):")
-    pred = df[df['is_prediction']].head(10)
+    split_idx = df.attrs['split_idx']
+    pred = df.iloc[split_idx + 1:split_idx + 11]
     for idx, row in pred.iterrows():
         t_str = row['time'].strftime('%H:%M')
         price = row['close']
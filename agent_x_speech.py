@@ -8,11 +8,15 @@ Optimized for WSL2 fortress environment
 import subprocess
 import os
 import json
+import re
 import sys
 import tempfile
 import time
 from pathlib import Path
 
+from piper_stream import PiperStream
+from coqui_tts import quantize_coqui
+
 # Colors
 BLUE = '\033[94m'
 CYAN = '\033[96m'
@@ -21,9 +25,15 @@ GREEN = '\033[92m'
 YELLOW = '\033[93m'
 RESET = '\033[0m'
 
+# Exit keywords (whole words, any case)
+EXIT_RE = re.compile(r'\b(?:exit|quit|stop|goodbye|shutdown)\b', re.IGNORECASE)
+
 # Base directory
 BASE_DIR = Path.home() / "fortress-ai"
 
+# Rendered Piper phrases, replayed instead of re-synthesized
+TTS_CACHE_DIR = BASE_DIR / "tts_cache"
+
 # Load TTS config
 try:
     with open(BASE_DIR / 'tts_config.json') as f:
@@ -39,7 +49,8 @@ except FileNotFoundError:
         },
         "coqui": {
             "model": "tts_models/multilingual/multi-dataset/xtts_v2",
-            "voice_sample": "voices/my_voice.wav"
+            "voice_sample": "voices/my_voice.wav",
+            "quantize": False
         }
     }
 
@@ -48,6 +59,16 @@ _pyttsx3_engine = None
 _coqui_engine = None
 _whisper_model = None
 
+# Persistent Piper pipeline, started on first use
+_piper = None
+
+def _get_piper(piper_bin, piper_model):
+    """Return the shared Piper pipeline, creating it on first use"""
+    global _piper
+    if _piper is None:
+        _piper = PiperStream(piper_bin, piper_model, cache_dir=TTS_CACHE_DIR)
+    return _piper
+
 def speak_pyttsx3(text):
     """Fast offline TTS (robot voice)"""
     global _pyttsx3_engine
@@ -66,6 +87,17 @@ def speak_pyttsx3(text):
         print(f"{RED}⚠️  pyttsx3 Error: {e}{RESET}")
         return False
 
+def _quantize_coqui(tts):
+    """Quantize the Coqui model to INT8 for CPU inference (opt-in: coqui.quantize)"""
+    if not config.get('coqui', {}).get('quantize', False):
+        return tts
+    try:
+        converted = quantize_coqui(tts)
+        print(f"{GREEN}✅ Coqui quantized to INT8 ({converted} GPT-2 Conv1D layers included){RESET}")
+    except Exception as e:
+        print(f"{YELLOW}⚠️  Coqui INT8 quantization skipped: {e}{RESET}")
+    return tts
+
 def speak_coqui(text):
     """Hyper-realistic TTS with voice cloning"""
     global _coqui_engine
@@ -76,7 +108,7 @@ def speak_coqui(text):
         if _coqui_engine is None:
             print(f"{YELLOW}Loading Coqui model (first time only)...{RESET}")
             model_name = config.get('coqui', {}).get('model', 'tts_models/multilingual/multi-dataset/xtts_v2')
-            _coqui_engine = TTS(model_name)
+            _coqui_engine = _quantize_coqui(TTS(model_name))
         
         # Generate speech
         temp_wav = tempfile.mktemp(suffix='.wav')
@@ -119,6 +151,7 @@ def speak_coqui(text):
 
 def speak_piper(text):
     """Fast natural TTS using Piper"""
+    piper = None
     try:
         piper_bin = BASE_DIR / config.get('piper', {}).get('binary', 'bin/piper')
         piper_model = BASE_DIR / config.get('piper', {}).get('model', 'voices/en_US-lessac-medium.onnx')
@@ -129,28 +162,19 @@ def speak_piper(text):
         if not piper_model.exists():
             raise FileNotFoundError(f"Piper model not found: {piper_model}")
         
-        # Generate speech
-        temp_wav = tempfile.mktemp(suffix='.wav')
-        
-        process = subprocess.run(
-            [str(piper_bin), '--model', str(piper_model), '--output_file', temp_wav],
-            input=text.encode('utf-8'),
-            capture_output=True,
-            timeout=30
-        )
+        piper = _get_piper(piper_bin, piper_model)
         
-        if process.returncode != 0:
-            raise Exception(f"Piper failed: {process.stderr.decode()}")
+        # Audio streams straight from Piper into the output stream; phrases rendered
+        # before are replayed from the cache
+        piper.say_cached(text)
         
-        # Play audio
-        subprocess.run(['aplay', '-q', temp_wav], 
-                      timeout=30,
-                      check=False)
-        os.remove(temp_wav)
+        piper.wait()
         return True
         
     except Exception as e:
         print(f"{RED}⚠️  Piper Error: {e}{RESET}")
+        if piper is not None:
+            piper.stop()
         return False
 
 def speak(text):
@@ -191,8 +215,6 @@ def listen():
     global _whisper_model
     try:
         import sounddevice as sd
-        from scipy.io.wavfile import write
-        import whisper
         import numpy as np
         
         print(f"\n{CYAN}🎤 Listening...{RESET} (speak now)")
@@ -209,20 +231,27 @@ def listen():
             print(f"{YELLOW}⚠️  No speech detected{RESET}")
             return ""
         
-        # Save and transcribe
-        temp_file = tempfile.mktemp(suffix='.wav')
-        write(temp_file, fs, (recording * 32767).astype(np.int16))
+        # Transcribe the buffer directly (float32 mono 16 kHz is Whisper's native input)
+        audio = recording.squeeze()
         
         print(f"{CYAN}🤖 Processing...{RESET}")
         
-        # Load Whisper model (cached)
+        # Load Whisper model (cached, INT8 faster-whisper when installed)
         if _whisper_model is None:
-            _whisper_model = whisper.load_model("base")
+            try:
+                from faster_whisper import WhisperModel
+                _whisper_model = WhisperModel("base", device="cpu", compute_type="int8")
+            except ImportError:
+                import whisper
+                _whisper_model = whisper.load_model("base")
         
-        result = _whisper_model.transcribe(temp_file, fp16=False)
+        if type(_whisper_model).__module__.startswith('faster_whisper'):
+            segments, _ = _whisper_model.transcribe(audio)
+            text = ' '.join(seg.text for seg in segments)
+        else:
+            text = _whisper_model.transcribe(audio, fp16=False)['text']
         
-        os.remove(temp_file)
-        return result['text'].strip()
+        return text.strip()
         
     except Exception as e:
         print(f"{RED}⚠️  STT Error: {e}{RESET}")
@@ -300,7 +329,7 @@ def main():
             print(f"{BLUE}YOU:{RESET} {user_input}\n")
             
             # Check for exit
-            if any(word in user_input.lower() for word in ['exit', 'quit', 'stop', 'goodbye', 'shutdown']):
+            if EXIT_RE.search(user_input):
                 speak("Agent X signing off. Operation complete.")
                 print(f"\n{CYAN}👋 Agent X signing off.{RESET}\n")
                 break
@@ -7,13 +7,17 @@ Target: <1.5s TTS latency, <2s total reaction time
 
 import json
 import os
+import queue
+import re
 import sys
 import time
-import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 import sounddevice as sd
-from scipy.io.wavfile import write
+from piper_stream import PiperStream
+from coqui_tts import quantize_coqui
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -25,7 +29,8 @@ DEFAULT_CONFIG = {
     "pyttsx3": {"rate": 150, "volume": 1.0},
     "coqui": {
         "model": "tts_models/multilingual/multi-dataset/xtts_v2",
-        "voice_sample": "voices/my_voice.wav"
+        "voice_sample": "voices/my_voice.wav",
+        "quantize": False
     },
     "piper": {
         "model": "voices/en_US-lessac-medium.onnx",
@@ -41,103 +46,206 @@ else:
     print(f"⚠️  Config not found, using defaults")
     config = DEFAULT_CONFIG
 
+# Sentence boundary (compiled once, shared by TTS chunking and LLM streaming)
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
 # Lazy model loading
 whisper_model = None
 tts_engine = None
 ollama_available = False
 
+# Persistent Piper pipeline (model loaded once, one sentence per stdin line);
+# rendered sentences are replayed from the cache instead of re-synthesized
+piper = PiperStream(
+    Path.home() / "fortress-ai" / config['piper']['binary'],
+    Path.home() / "fortress-ai" / config['piper']['model'],
+    cache_dir=Path.home() / "fortress-ai" / "tts_cache"
+)
 
-def init_models():
-    """Initialize models on first use."""
-    global whisper_model, tts_engine, ollama_available
-    
-    # Whisper STT
-    if whisper_model is None:
+
+def load_whisper():
+    """Load the Whisper STT model (INT8 faster-whisper when installed)."""
+    try:
         try:
+            from faster_whisper import WhisperModel
+            print("Loading Whisper model (faster-whisper int8)...")
+            model = WhisperModel("base", device="cpu", compute_type="int8")
+        except ImportError:
             import whisper
             print("Loading Whisper model...")
-            whisper_model = whisper.load_model("base")
-            print("✅ Whisper loaded")
-        except Exception as e:
-            print(f"❌ Whisper failed: {e}")
-            sys.exit(1)
-    
-    # Ollama check
+            model = whisper.load_model("base")
+        print("✅ Whisper loaded")
+        return model
+    except Exception as e:
+        print(f"❌ Whisper failed: {e}")
+        sys.exit(1)
+
+
+def whisper_transcribe(audio):
+    """Transcribe with whichever Whisper backend was loaded."""
+    if type(whisper_model).__module__.startswith('faster_whisper'):
+        segments, _ = whisper_model.transcribe(audio)
+        return ' '.join(seg.text for seg in segments).strip()
+    return whisper_model.transcribe(audio, fp16=False)['text'].strip()
+
+
+def probe_ollama():
+    """Return True if the Ollama service answers."""
     try:
         import ollama
         ollama.list()
-        ollama_available = True
         print("✅ Ollama connected")
+        return True
     except Exception as e:
         print(f"⚠️  Ollama not available: {e}")
-        ollama_available = False
+        return False
+
+
+def maybe_quantize_coqui(tts):
+    """Quantize the Coqui model to INT8 for CPU inference (opt-in: coqui.quantize)."""
+    if not config['coqui'].get('quantize', False):
+        return tts
+    try:
+        converted = quantize_coqui(tts)
+        print(f"✅ Coqui quantized to INT8 ({converted} GPT-2 Conv1D layers included)")
+    except Exception as e:
+        print(f"⚠️  Coqui INT8 quantization skipped: {e}")
+    return tts
+
+
+def init_models():
+    """Initialize models on first use.
     
-    # TTS Engine
-    if tts_engine is None:
-        engine_type = config.get('engine', 'piper')
-        print(f"Loading TTS engine: {engine_type}")
+    Whisper and the Ollama probe load on worker threads while the TTS
+    engine loads on the main thread (pyttsx3 drivers are thread-affine),
+    so startup costs max(load times) instead of their sum.
+    """
+    global whisper_model, tts_engine, ollama_available
+    
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # Whisper STT
+        whisper_future = pool.submit(load_whisper) if whisper_model is None else None
+        # Ollama check
+        ollama_future = pool.submit(probe_ollama)
         
-        if engine_type == 'piper':
-            # Piper uses subprocess - no loading needed
-            piper_model = Path.home() / "fortress-ai" / config['piper']['model']
-            piper_binary = Path.home() / "fortress-ai" / config['piper']['binary']
-            if not piper_model.exists():
-                print(f"❌ Piper model not found: {piper_model}")
-                print("Run install script first!")
-                sys.exit(1)
-            print(f"✅ Piper ready: {piper_model.name}")
+        # TTS Engine
+        if tts_engine is None:
+            engine_type = config.get('engine', 'piper')
+            print(f"Loading TTS engine: {engine_type}")
         
-        elif engine_type == 'coqui':
-            try:
-                from TTS.api import TTS
-                tts_engine = TTS(config['coqui']['model'], gpu=False)
-                print(f"✅ Coqui loaded: {config['coqui']['model']}")
-            except Exception as e:
-                print(f"❌ Coqui failed: {e}")
-                print("Falling back to pyttsx3...")
-                config['engine'] = 'pyttsx3'
+            if engine_type == 'piper':
+                # Piper runs as a persistent subprocess
+                piper_model = Path.home() / "fortress-ai" / config['piper']['model']
+                piper_binary = Path.home() / "fortress-ai" / config['piper']['binary']
+                if not piper_model.exists():
+                    print(f"❌ Piper model not found: {piper_model}")
+                    print("Run install script first!")
+                    sys.exit(1)
+                try:
+                    piper.start()
+                    print(f"✅ Piper ready: {piper_model.name}")
+                except Exception as e:
+                    # Not fatal: the first sentence spoken starts it (and reports per sentence)
+                    print(f"⚠️  Piper not started yet ({e}); will retry on first use")
         
-        elif engine_type == 'pyttsx3':
-            try:
-                import pyttsx3
-                tts_engine = pyttsx3.init()
-                tts_engine.setProperty('rate', config['pyttsx3']['rate'])
-                tts_engine.setProperty('volume', config['pyttsx3']['volume'])
-                print("✅ pyttsx3 loaded")
-            except Exception as e:
-                print(f"❌ pyttsx3 failed: {e}")
-                sys.exit(1)
+            elif engine_type == 'coqui':
+                try:
+                    from TTS.api import TTS
+                    tts_engine = maybe_quantize_coqui(TTS(config['coqui']['model'], gpu=False))
+                    print(f"✅ Coqui loaded: {config['coqui']['model']}")
+                except Exception as e:
+                    print(f"❌ Coqui failed: {e}")
+                    print("Falling back to pyttsx3...")
+                    config['engine'] = 'pyttsx3'
+        
+            elif engine_type == 'pyttsx3':
+                try:
+                    import pyttsx3
+                    tts_engine = pyttsx3.init()
+                    tts_engine.setProperty('rate', config['pyttsx3']['rate'])
+                    tts_engine.setProperty('volume', config['pyttsx3']['volume'])
+                    print("✅ pyttsx3 loaded")
+                except Exception as e:
+                    print(f"❌ pyttsx3 failed: {e}")
+                    sys.exit(1)
+        
+        if whisper_future is not None:
+            whisper_model = whisper_future.result()
+        ollama_available = ollama_future.result()
 
 
-def listen_and_transcribe(duration=5, sample_rate=16000):
-    """Capture audio and transcribe with Whisper."""
-    print("\n🎤 Listening... (speak now)")
+def record_utterance(duration=5, sample_rate=16000, threshold=0.01,
+                     block_ms=10, silence_ms=800):
+    """
+    Record until speech is followed by sustained silence, or `duration` elapses.
+    Energy is accumulated per 10ms block in the stream callback, so the
+    endpoint is detected while recording instead of after a fixed-length take.
+    Returns (audio, heard_speech).
+    """
+    blocksize = sample_rate * block_ms // 1000
+    max_blocks = duration * 1000 // block_ms
+    silence_blocks = silence_ms // block_ms
+    blocks = []
+    heard_speech = False
+    silent_run = 0
+    finished = threading.Event()
     
-    audio = sd.rec(
-        int(duration * sample_rate),
+    def callback(indata, frames, time_info, status):
+        nonlocal heard_speech, silent_run
+        block = indata[:, 0].copy()
+        blocks.append(block)
+        
+        rms = np.sqrt(np.dot(block, block) / frames)
+        if rms >= threshold:
+            heard_speech = True
+            silent_run = 0
+        elif heard_speech:
+            silent_run += 1
+        
+        if (heard_speech and silent_run >= silence_blocks) or len(blocks) >= max_blocks:
+            raise sd.CallbackStop
+    
+    with sd.InputStream(
         samplerate=sample_rate,
         channels=1,
-        dtype='float32'
-    )
-    sd.wait()
+        dtype='float32',
+        blocksize=blocksize,
+        callback=callback,
+        finished_callback=finished.set
+    ):
+        finished.wait(duration + 1)
     
-    # Voice activity detection (simple energy threshold)
-    energy = np.sqrt(np.mean(audio**2))
-    if energy < 0.01:
-        return ""  # Silent
+    audio = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+    return audio, heard_speech
+
+
+def listen_and_transcribe(duration=5, sample_rate=16000):
+    """Capture audio and transcribe with Whisper."""
+    print("\n🎤 Listening... (speak now)")
     
-    # Save and transcribe
-    temp_path = "/tmp/fortress_audio.wav"
-    write(temp_path, sample_rate, (audio * 32767).astype(np.int16))
+    # Voice activity detection (streaming energy threshold + endpointing)
+    audio, heard_speech = record_utterance(duration, sample_rate)
+    if not heard_speech:
+        return ""  # Silent
     
+    # Transcribe the buffer directly (float32 mono 16 kHz is Whisper's native input)
     try:
-        result = whisper_model.transcribe(temp_path, fp16=False)
-        return result['text'].strip()
+        return whisper_transcribe(audio)
     except Exception as e:
         print(f"❌ Transcription error: {e}")
         return ""
 
 
+def play_wavs(wav_queue, samplerate=22050):
+    """Playback thread: play queued waveforms back to back until None."""
+    for wav in iter(wav_queue.get, None):
+        try:
+            sd.play(wav, samplerate=samplerate)
+            sd.wait()
+        except Exception as e:
+            print(f"⚠️  Playback error: {e}")
+
+
 def speak_streaming(text):
     """
     Streaming TTS with sentence-level chunking.
@@ -146,47 +254,50 @@ def speak_streaming(text):
     if not text or len(text) < 2:
         return
     
+    # Split into sentences
+    sentences = [s.strip() for s in SENTENCE_RE.split(text) if s.strip()]
+    speak_sentences(sentences)
+
+
+def speak_sentences(sentences):
+    """
+    Speak an iterable of sentences as they arrive.
+    Accepts a live generator so playback can start before the LLM finishes.
+    """
     start_time = time.time()
     engine_type = config.get('engine', 'piper')
     
-    # Split into sentences
-    import re
-    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
-    
     first_audio_time = None
     
     # === PIPER (FASTEST) ===
     if engine_type == 'piper':
-        piper_binary = Path.home() / "fortress-ai" / config['piper']['binary']
-        piper_model = Path.home() / "fortress-ai" / config['piper']['model']
-        
         for sentence in sentences:
             try:
-                # Generate WAV to stdout
-                result = subprocess.run(
-                    [str(piper_binary), '--model', str(piper_model), '--output_file', '/tmp/piper_chunk.wav'],
-                    input=sentence.encode(),
-                    capture_output=True,
-                    check=True
-                )
+                # Audio streams from Piper (or the cache) into the output stream
+                piper.say_cached(sentence)
                 
                 if first_audio_time is None:
                     first_audio_time = time.time() - start_time
                     print(f"⚡ First audio: {first_audio_time:.2f}s")
                 
-                # Play immediately
-                if Path('/tmp/piper_chunk.wav').exists():
-                    subprocess.run(['aplay', '-q', '/tmp/piper_chunk.wav'], check=False)
-                
             except Exception as e:
                 print(f"⚠️  Piper chunk error: {e}")
+                piper.stop()
+        
+        # Wait for queued audio to finish playing
+        piper.wait()
     
     # === COQUI (HIGH QUALITY) ===
     elif engine_type == 'coqui':
+        # Playback runs on its own thread so sentence N+1 synthesizes
+        # while sentence N is still playing
+        wav_queue = queue.Queue()
+        player = threading.Thread(target=play_wavs, args=(wav_queue,), daemon=True)
+        player.start()
+        voice_sample = Path.home() / "fortress-ai" / config['coqui']['voice_sample']
+        
         for sentence in sentences:
             try:
-                voice_sample = Path.home() / "fortress-ai" / config['coqui']['voice_sample']
-                
                 wav = tts_engine.tts(
                     text=sentence,
                     speaker_wav=str(voice_sample) if voice_sample.exists() else None,
@@ -197,45 +308,77 @@ def speak_streaming(text):
                     first_audio_time = time.time() - start_time
                     print(f"⚡ First audio: {first_audio_time:.2f}s")
                 
-                # Play with sounddevice
-                sd.play(np.array(wav), samplerate=22050)
-                sd.wait()
+                wav_queue.put(np.asarray(wav, dtype=np.float32))
                 
             except Exception as e:
                 print(f"⚠️  Coqui chunk error: {e}")
+        
+        wav_queue.put(None)
+        player.join()
     
     # === PYTTSX3 (FALLBACK) ===
     elif engine_type == 'pyttsx3':
-        try:
-            tts_engine.say(text)
-            tts_engine.runAndWait()
-            first_audio_time = time.time() - start_time
-            print(f"⚡ Audio time: {first_audio_time:.2f}s")
-        except Exception as e:
-            print(f"⚠️  pyttsx3 error: {e}")
+        for sentence in sentences:
+            try:
+                tts_engine.say(sentence)
+                tts_engine.runAndWait()
+                
+                if first_audio_time is None:
+                    first_audio_time = time.time() - start_time
+                    print(f"⚡ Audio time: {first_audio_time:.2f}s")
+            except Exception as e:
+                print(f"⚠️  pyttsx3 error: {e}")
     
     total_time = time.time() - start_time
     print(f"🔊 Total TTS: {total_time:.2f}s")
 
 
-def query_ollama(user_input):
-    """Query Ollama LLM with error handling."""
+def query_ollama_stream(user_input):
+    """Stream the Ollama reply, yielding each sentence as soon as it completes."""
     if not ollama_available:
-        return "Ollama is not available. Please start Ollama service."
+        yield "Ollama is not available. Please start Ollama service."
+        return
     
+    buf = ''
     try:
         import ollama
-        response = ollama.chat(
+        stream = ollama.chat(
             model='qwen2.5:7b-instruct-q4_K_M',
             messages=[
                 {'role': 'system', 'content': 'You are Agent X, a tactical AI assistant investigating the Longo case. Be concise and direct. Keep responses under 50 words for voice interface.'},
                 {'role': 'user', 'content': user_input}
-            ]
+            ],
+            stream=True
         )
-        return response['message']['content']
+        for chunk in stream:
+            buf += chunk['message']['content']
+            parts = SENTENCE_RE.split(buf)
+            for sentence in parts[:-1]:
+                if sentence.strip():
+                    yield sentence.strip()
+            buf = parts[-1]
     except Exception as e:
         print(f"❌ Ollama error: {e}")
-        return f"Query error: {str(e)}"
+        buf += f" Query error: {str(e)}"
+    
+    if buf.strip():
+        yield buf.strip()
+
+
+def produce_sentences(user_input, sentence_queue):
+    """Background producer: push streamed LLM sentences onto the TTS queue."""
+    try:
+        for sentence in query_ollama_stream(user_input):
+            sentence_queue.put(sentence)
+    finally:
+        sentence_queue.put(None)
+
+
+def echo_sentences(sentences):
+    """Print each sentence as it reaches the speaker."""
+    for sentence in sentences:
+        print(f"   {sentence}")
+        yield sentence
 
 
 def main():
@@ -272,16 +415,23 @@ def main():
             print(f"\n[Conversation {conversation_count}]")
             print(f"👤 YOU: {user_input}")
             
-            # Query LLM
+            # Query LLM on a background thread; speak sentences as they complete
+            # (TTS stays on the main thread, pyttsx3 drivers are thread-affine)
             query_start = time.time()
-            agent_response = query_ollama(user_input)
-            query_time = time.time() - query_start
+            sentence_queue = queue.Queue()
+            producer = threading.Thread(
+                target=produce_sentences,
+                args=(user_input, sentence_queue),
+                daemon=True
+            )
+            producer.start()
             
-            print(f"🤖 AGENT X: {agent_response}")
-            print(f"⏱️  LLM: {query_time:.2f}s")
+            print("🤖 AGENT X:")
+            speak_sentences(echo_sentences(iter(sentence_queue.get, None)))
+            producer.join()
+            query_time = time.time() - query_start
             
-            # Speak response
-            speak_streaming(agent_response)
+            print(f"⏱️  LLM + TTS: {query_time:.2f}s")
             
             print("-" * 70)
             
@@ -20,13 +20,37 @@ All 4 Critical Fixes Implemented:
 ✅ Fix #4: Path validation - All file operations validated
 """
 
-import os
+import atexit
+import queue
+import re
 import sys
 import logging
 import json
+from collections import namedtuple
 from datetime import datetime
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from string import Template
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Document section separator (built once, shared by every generator)
+SEP = "=" * 80
+
+# Evidence date formats, scanned in a single pass per line
+DATE_RE = re.compile(
+    r'\b(?:'
+    r'(?P<iso>\d{4}-\d{2}-\d{2})'  # YYYY-MM-DD
+    r'|(?P<slash>\d{1,2}/\d{1,2}/\d{4})'  # MM/DD/YYYY or DD/MM/YYYY
+    r'|(?P<dash>\d{1,2}-\d{1,2}-\d{4})'  # MM-DD-YYYY or DD-MM-YYYY
+    r'|(?P<long>(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4})'  # Month DD, YYYY
+    r')\b',
+    re.IGNORECASE
+)
+
+# One dated line found by analyze_evidence_timeline
+TimelineEvent = namedtuple('TimelineEvent', ['date', 'description', 'position'])
+
+# Fields every OHLC record passed to insert_francesco_algorithm must carry
+OHLC_REQUIRED = frozenset(('time', 'open', 'high', 'low', 'close'))
 
 # ANSI Colors for terminal output
 class Colors:
@@ -39,6 +63,26 @@ class Colors:
     BOLD = '\033[1m'
     RESET = '\033[0m'
 
+# Colored menu separators
+CYAN_SEP = f"{Colors.CYAN}{SEP}{Colors.RESET}"
+GREEN_SEP = f"{Colors.GREEN}{SEP}{Colors.RESET}"
+
+# Prebuilt menu screens and prompts (redrawn on every loop iteration)
+MAIN_MENU = "\n".join([
+    GREEN_SEP,
+    f"{Colors.BOLD}MAIN MENU{Colors.RESET}",
+    GREEN_SEP,
+    f"{Colors.CYAN}1.{Colors.RESET} Generate Form 7A (Statement of Claim)",
+    f"{Colors.CYAN}2.{Colors.RESET} Generate Motion to Dismiss",
+    f"{Colors.CYAN}3.{Colors.RESET} Analyze Evidence Timeline",
+    f"{Colors.CYAN}4.{Colors.RESET} Generate Social Media Content",
+    f"{Colors.CYAN}5.{Colors.RESET} Chart System (Francesco's Algorithm Interface)",
+    f"{Colors.CYAN}6.{Colors.RESET} System Information",
+    f"{Colors.CYAN}7.{Colors.RESET} Exit",
+    f"{GREEN_SEP}\n",
+])
+PRESS_ENTER = f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}"
+
 # Get base directory (repository root)
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -52,6 +96,26 @@ SOCIAL_DIR = DATA_DIR / "social"
 CHARTS_DIR = DATA_DIR / "charts"
 CONFIG_DIR = BASE_DIR / "config"
 
+# Every directory the app relies on, in System Information display order
+APP_DIRECTORIES = {
+    'Output': OUTPUT_DIR,
+    'Logs': LOGS_DIR,
+    'Templates': TEMPLATES_DIR,
+    'Evidence': EVIDENCE_DIR,
+    'Social': SOCIAL_DIR,
+    'Charts': CHARTS_DIR,
+    'Config': CONFIG_DIR
+}
+
+# Sample OHLCV series for the chart system menu
+SAMPLE_OHLCV = [
+    {"time": "2024-01-01", "open": 100, "high": 110, "low": 95, "close": 108, "volume": 50000},
+    {"time": "2024-02-01", "open": 108, "high": 115, "low": 105, "close": 112, "volume": 60000},
+    {"time": "2024-03-01", "open": 112, "high": 120, "low": 110, "close": 118, "volume": 75000},
+    {"time": "2024-04-01", "open": 118, "high": 125, "low": 115, "close": 122, "volume": 80000},
+    {"time": "2024-05-01", "open": 122, "high": 130, "low": 120, "close": 128, "volume": 90000},
+]
+
 # Logging setup
 def setup_logging():
     """Configure rotating log handler with error handling"""
@@ -74,15 +138,20 @@ def setup_logging():
         )
         handler.setFormatter(formatter)
         
-        # Configure root logger
-        logger = logging.getLogger()
-        logger.setLevel(logging.INFO)
-        logger.addHandler(handler)
-        
         # Also log to console
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        
+        # Configure root logger: callers only enqueue records, a listener
+        # thread does the formatting and file/console writes
+        log_queue = queue.SimpleQueue()
+        logger = logging.getLogger()
+        logger.setLevel(logging.INFO)
+        logger.addHandler(QueueHandler(log_queue))
+        
+        listener = QueueListener(log_queue, handler, console_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
         
         logging.info("=" * 60)
         logging.info("AGENT X FORTRESS - Application Started")
@@ -99,7 +168,7 @@ def safe_save_file(content, filename, filepath):
     Safely save file with comprehensive error handling and path validation
     
     Args:
-        content (str): Content to write to file
+        content (str or iterable of str): Content, or chunks streamed to the file
         filename (str): Name of the file
         filepath (Path or str): Directory path where file should be saved
         
@@ -110,23 +179,15 @@ def safe_save_file(content, filename, filepath):
         # Convert to Path object
         filepath = Path(filepath)
         
-        # Validate filepath exists, create if needed
-        if not filepath.exists():
-            try:
-                filepath.mkdir(parents=True, exist_ok=True)
-                logging.info(f"Created directory: {filepath}")
-            except PermissionError:
-                error_msg = f"❌ Permission denied: Cannot create directory {filepath}"
-                logging.error(error_msg)
-                return False, error_msg
-            except Exception as e:
-                error_msg = f"❌ Error creating directory {filepath}: {str(e)}"
-                logging.error(error_msg)
-                return False, error_msg
-        
-        # Check if directory is writable
-        if not os.access(filepath, os.W_OK):
-            error_msg = f"❌ Permission denied: Directory {filepath} is not writable"
+        # Create directory if needed (no-op when it already exists)
+        try:
+            filepath.mkdir(parents=True, exist_ok=True)
+        except PermissionError:
+            error_msg = f"❌ Permission denied: Cannot create directory {filepath}"
+            logging.error(error_msg)
+            return False, error_msg
+        except OSError as e:
+            error_msg = f"❌ Error creating directory {filepath}: {str(e)}"
             logging.error(error_msg)
             return False, error_msg
         
@@ -135,11 +196,19 @@ def safe_save_file(content, filename, filepath):
         
         # Write file
         try:
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            if isinstance(content, str):
+                # Encode once and hand the whole document to a single write()
+                data = content.encode('utf-8')
+                with open(full_path, 'wb', buffering=0) as f:
+                    f.write(data)
+                size = len(content)
+            else:
+                # Stream chunks through a 64 KiB buffer instead of joining them first
+                with open(full_path, 'w', encoding='utf-8', buffering=65536) as f:
+                    size = sum(map(f.write, content))
             
-            success_msg = f"✅ Saved: {filename} ({len(content)} bytes)"
-            logging.info(f"File saved successfully: {full_path}")
+            success_msg = f"✅ Saved: {filename} ({size} bytes)"
+            logging.info("File saved successfully: %s", full_path)
             return True, success_msg
             
         except PermissionError:
@@ -167,97 +236,45 @@ def safe_read_file(filepath):
     Returns:
         tuple: (success: bool, content: str or error message)
     """
+    filepath = Path(filepath)
     try:
-        filepath = Path(filepath)
-        
-        if not filepath.exists():
-            error_msg = f"❌ File not found: {filepath}"
-            logging.error(error_msg)
-            return False, error_msg
-        
-        if not os.access(filepath, os.R_OK):
-            error_msg = f"❌ Permission denied: Cannot read {filepath}"
-            logging.error(error_msg)
-            return False, error_msg
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        logging.info(f"File read successfully: {filepath}")
-        return True, content
-        
+        # One open() instead of stat + open; failures are dispatched below
+        content = filepath.read_text(encoding='utf-8')
+    except FileNotFoundError:
+        error_msg = f"❌ File not found: {filepath}"
+    except PermissionError:
+        error_msg = f"❌ Permission denied: Cannot read {filepath}"
     except Exception as e:
         error_msg = f"❌ Error reading file: {str(e)}"
-        logging.error(error_msg)
-        return False, error_msg
-
-class AgentXFortress:
-    """Main application class for Agent X Fortress"""
-    
-    def __init__(self):
-        """Initialize the application"""
-        self.version = "1.0.0"
-        self.ensure_directories()
-    
-    def ensure_directories(self):
-        """Ensure all required directories exist"""
-        directories = [
-            LOGS_DIR, OUTPUT_DIR, TEMPLATES_DIR, 
-            EVIDENCE_DIR, SOCIAL_DIR, CHARTS_DIR, CONFIG_DIR
-        ]
-        
-        for directory in directories:
-            try:
-                directory.mkdir(parents=True, exist_ok=True)
-            except Exception as e:
-                logging.warning(f"Could not create directory {directory}: {e}")
+    else:
+        logging.info("File read successfully: %s", filepath)
+        return True, content
     
-    def generate_form_7a(self, case_info):
-        """
-        Generate Form 7A Federal Court Document
-        
-        Args:
-            case_info (dict): Case information including:
-                - case_number: str
-                - court: str
-                - plaintiff: str
-                - defendant: str
-                - facts: list of str
-                - grounds: list of str
-                - relief: str
-        
-        Returns:
-            tuple: (success: bool, message: str)
-        """
-        try:
-            # Validate required fields
-            required_fields = ['case_number', 'court', 'plaintiff', 'defendant']
-            for field in required_fields:
-                if field not in case_info:
-                    return False, f"❌ Missing required field: {field}"
-            
-            # Generate document content
-            content = f"""
-{'=' * 80}
+    logging.error(error_msg)
+    return False, error_msg
+
+# Document templates (compiled once at import, filled with Template.substitute)
+FORM_7A_TEMPLATE = Template(f"""
+{SEP}
 FORM 7A - STATEMENT OF CLAIM
-{'=' * 80}
+{SEP}
 
-Court File No.: {case_info.get('case_number', 'N/A')}
+Court File No.: $case_number
 
-IN THE {case_info.get('court', 'FEDERAL COURT')}
+IN THE $court
 
 BETWEEN:
 
-    {case_info.get('plaintiff', 'N/A').upper()}
+    $plaintiff_upper
                                                                     Plaintiff
 - and -
 
-    {case_info.get('defendant', 'N/A').upper()}
+    $defendant_upper
                                                                     Defendant
 
-{'=' * 80}
+{SEP}
 STATEMENT OF CLAIM
-{'=' * 80}
+{SEP}
 
 TO THE DEFENDANT:
 
@@ -274,54 +291,36 @@ if you are served in Canada.
 IF YOU FAIL TO DEFEND THIS PROCEEDING, judgment may be given against you in your
 absence and without further notice to you.
 
-Date: {datetime.now().strftime('%B %d, %Y')}
+Date: $date_long
 
 
-{'=' * 80}
+{SEP}
 STATEMENT OF FACTS
-{'=' * 80}
+{SEP}
 
-"""
-            # Add facts
-            facts = case_info.get('facts', [])
-            if facts:
-                for i, fact in enumerate(facts, 1):
-                    content += f"{i}. {fact}\n\n"
-            else:
-                content += "1. [State the material facts upon which you rely]\n\n"
-            
-            content += f"""
-{'=' * 80}
+$facts_block
+{SEP}
 LEGAL GROUNDS
-{'=' * 80}
+{SEP}
 
-"""
-            # Add legal grounds
-            grounds = case_info.get('grounds', [])
-            if grounds:
-                for i, ground in enumerate(grounds, 1):
-                    content += f"{i}. {ground}\n\n"
-            else:
-                content += "1. [Cite the legal provisions upon which you rely]\n\n"
-            
-            content += f"""
-{'=' * 80}
+$grounds_block
+{SEP}
 RELIEF SOUGHT
-{'=' * 80}
+{SEP}
 
 The Plaintiff claims:
 
-{case_info.get('relief', '1. [Specify the relief sought]')}
+$relief
 
 
-{'=' * 80}
+{SEP}
 SIGNATURE
-{'=' * 80}
+{SEP}
 
-Date: {datetime.now().strftime('%B %d, %Y')}
+Date: $date_long
 
 _________________________________
-{case_info.get('plaintiff', 'Plaintiff')}
+$plaintiff
 Plaintiff (or Solicitor for the Plaintiff)
 
 Address: ___________________________
@@ -331,72 +330,32 @@ Address: ___________________________
 Email: _____________________________
 Phone: _____________________________
 
-{'=' * 80}
+{SEP}
 END OF DOCUMENT
-{'=' * 80}
-"""
-            
-            # Save to file
-            filename = f"Form_7A_{case_info.get('case_number', 'draft').replace('/', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            success, message = safe_save_file(content, filename, OUTPUT_DIR)
-            
-            if success:
-                logging.info(f"Form 7A generated: {filename}")
-                return True, f"{message}\nPath: {OUTPUT_DIR / filename}"
-            else:
-                return False, message
-                
-        except Exception as e:
-            error_msg = f"❌ Error generating Form 7A: {str(e)}"
-            logging.error(error_msg)
-            return False, error_msg
-    
-    # FIX #2: Method correctly named as generate_motion_to_dismiss()
-    def generate_motion_to_dismiss(self, case_info):
-        """
-        Generate Motion to Dismiss document
-        
-        Args:
-            case_info (dict): Case information including:
-                - case_number: str
-                - court: str
-                - plaintiff: str
-                - defendant: str
-                - grounds: list of str (grounds for dismissal)
-                - arguments: list of str (legal arguments)
-        
-        Returns:
-            tuple: (success: bool, message: str)
-        """
-        try:
-            # Validate required fields
-            required_fields = ['case_number', 'court', 'plaintiff', 'defendant']
-            for field in required_fields:
-                if field not in case_info:
-                    return False, f"❌ Missing required field: {field}"
-            
-            # Generate document content
-            content = f"""
-{'=' * 80}
+{SEP}
+""")
+
+MOTION_TO_DISMISS_TEMPLATE = Template(f"""
+{SEP}
 MOTION TO DISMISS
-{'=' * 80}
+{SEP}
 
-Court File No.: {case_info.get('case_number', 'N/A')}
+Court File No.: $case_number
 
-IN THE {case_info.get('court', 'FEDERAL COURT')}
+IN THE $court
 
 BETWEEN:
 
-    {case_info.get('plaintiff', 'N/A').upper()}
+    $plaintiff_upper
                                                                     Plaintiff
 - and -
 
-    {case_info.get('defendant', 'N/A').upper()}
+    $defendant_upper
                                                                     Defendant
 
-{'=' * 80}
+{SEP}
 NOTICE OF MOTION
-{'=' * 80}
+{SEP}
 
 TAKE NOTICE that the Defendant will make a motion to the Court on a date to be
 fixed by the Court, or as soon thereafter as the motion can be heard, for an
@@ -404,35 +363,15 @@ Order dismissing this action.
 
 THE GROUNDS FOR THIS MOTION ARE:
 
-"""
-            # Add grounds
-            grounds = case_info.get('grounds', [])
-            if grounds:
-                for i, ground in enumerate(grounds, 1):
-                    content += f"{i}. {ground}\n\n"
-            else:
-                content += "1. The Statement of Claim discloses no reasonable cause of action.\n\n"
-                content += "2. The Court lacks jurisdiction over the subject matter of this action.\n\n"
-                content += "3. The Plaintiff lacks standing to bring this action.\n\n"
-            
-            content += f"""
-{'=' * 80}
+$grounds_block
+{SEP}
 LEGAL ARGUMENT
-{'=' * 80}
+{SEP}
 
-"""
-            # Add arguments
-            arguments = case_info.get('arguments', [])
-            if arguments:
-                for i, argument in enumerate(arguments, 1):
-                    content += f"{i}. {argument}\n\n"
-            else:
-                content += "1. [State your legal arguments for dismissal]\n\n"
-            
-            content += f"""
-{'=' * 80}
+$arguments_block
+{SEP}
 CONCLUSION
-{'=' * 80}
+{SEP}
 
 For the foregoing reasons, the Defendant respectfully requests that this
 Honourable Court grant an Order:
@@ -442,19 +381,19 @@ Honourable Court grant an Order:
 3. Such further and other relief as this Honourable Court deems just.
 
 
-{'=' * 80}
+{SEP}
 CERTIFICATE OF SERVICE
-{'=' * 80}
+{SEP}
 
 I hereby certify that a copy of this Motion to Dismiss was served on the
 Plaintiff's solicitor (or the Plaintiff, if unrepresented) on
-{datetime.now().strftime('%B %d, %Y')} by [method of service].
+$date_long by [method of service].
 
 
-Date: {datetime.now().strftime('%B %d, %Y')}
+Date: $date_long
 
 _________________________________
-{case_info.get('defendant', 'Defendant')}
+$defendant
 Defendant (or Solicitor for the Defendant)
 
 Address: ___________________________
@@ -464,17 +403,179 @@ Address: ___________________________
 Email: _____________________________
 Phone: _____________________________
 
-{'=' * 80}
+{SEP}
 END OF DOCUMENT
-{'=' * 80}
-"""
+{SEP}
+""")
+
+CHART_DATA_MARKER = "document.getElementById('dataInput').value = '';"
+
+class AgentXFortress:
+    """Main application class for Agent X Fortress"""
+    
+    def __init__(self):
+        """Initialize the application"""
+        self.version = "1.0.0"
+        self._chart_template = None
+        self._chart_head = self._chart_tail = None
+        self.ensure_directories()
+    
+    def load_chart_template(self):
+        """Read the chart template once and reuse it for every chart"""
+        if self._chart_template is None:
+            success, content = safe_read_file(CHARTS_DIR / "chart_template.html")
+            if not success:
+                return False, content
+            self._chart_template = content
+            # Split around the data marker once; each chart is then a 3-way concat
+            head, found, tail = content.partition(CHART_DATA_MARKER)
+            if found:
+                self._chart_head, self._chart_tail = head, tail
+        return True, self._chart_template
+    
+    def ensure_directories(self):
+        """Ensure all required directories exist"""
+        for directory in APP_DIRECTORIES.values():
+            # A stat is cheaper than mkdir() + swallowed FileExistsError
+            if directory.is_dir():
+                continue
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+            except Exception as e:
+                logging.warning("Could not create directory %s: %s", directory, e)
+    
+    def generate_form_7a(self, case_info):
+        """
+        Generate Form 7A Federal Court Document
+        
+        Args:
+            case_info (dict): Case information including:
+                - case_number: str
+                - court: str
+                - plaintiff: str
+                - defendant: str
+                - facts: list of str
+                - grounds: list of str
+                - relief: str
+        
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        try:
+            now = datetime.now()
+            date_long = now.strftime('%B %d, %Y')
+            stamp = now.strftime('%Y%m%d_%H%M%S')
+            
+            # Validate required fields
+            required_fields = ['case_number', 'court', 'plaintiff', 'defendant']
+            for field in required_fields:
+                if field not in case_info:
+                    return False, f"❌ Missing required field: {field}"
+            
+            # Numbered sections
+            facts = case_info.get('facts', [])
+            if facts:
+                facts_block = "".join(f"{i}. {fact}\n\n" for i, fact in enumerate(facts, 1))
+            else:
+                facts_block = "1. [State the material facts upon which you rely]\n\n"
+            
+            grounds = case_info.get('grounds', [])
+            if grounds:
+                grounds_block = "".join(f"{i}. {ground}\n\n" for i, ground in enumerate(grounds, 1))
+            else:
+                grounds_block = "1. [Cite the legal provisions upon which you rely]\n\n"
+            
+            # Generate document content
+            content = FORM_7A_TEMPLATE.substitute(
+                case_number=case_info.get('case_number', 'N/A'),
+                court=case_info.get('court', 'FEDERAL COURT'),
+                plaintiff_upper=case_info.get('plaintiff', 'N/A').upper(),
+                defendant_upper=case_info.get('defendant', 'N/A').upper(),
+                plaintiff=case_info.get('plaintiff', 'Plaintiff'),
+                relief=case_info.get('relief', '1. [Specify the relief sought]'),
+                date_long=date_long,
+                facts_block=facts_block,
+                grounds_block=grounds_block
+            )
+            
+            # Save to file
+            filename = f"Form_7A_{case_info.get('case_number', 'draft').replace('/', '_')}_{stamp}.txt"
+            success, message = safe_save_file(content, filename, OUTPUT_DIR)
+            
+            if success:
+                logging.info("Form 7A generated: %s", filename)
+                return True, f"{message}\nPath: {OUTPUT_DIR / filename}"
+            else:
+                return False, message
+                
+        except Exception as e:
+            error_msg = f"❌ Error generating Form 7A: {str(e)}"
+            logging.error(error_msg)
+            return False, error_msg
+    
+    # FIX #2: Method correctly named as generate_motion_to_dismiss()
+    def generate_motion_to_dismiss(self, case_info):
+        """
+        Generate Motion to Dismiss document
+        
+        Args:
+            case_info (dict): Case information including:
+                - case_number: str
+                - court: str
+                - plaintiff: str
+                - defendant: str
+                - grounds: list of str (grounds for dismissal)
+                - arguments: list of str (legal arguments)
+        
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        try:
+            now = datetime.now()
+            date_long = now.strftime('%B %d, %Y')
+            stamp = now.strftime('%Y%m%d_%H%M%S')
+            
+            # Validate required fields
+            required_fields = ['case_number', 'court', 'plaintiff', 'defendant']
+            for field in required_fields:
+                if field not in case_info:
+                    return False, f"❌ Missing required field: {field}"
+            
+            # Numbered sections
+            grounds = case_info.get('grounds', [])
+            if grounds:
+                grounds_block = "".join(f"{i}. {ground}\n\n" for i, ground in enumerate(grounds, 1))
+            else:
+                grounds_block = (
+                    "1. The Statement of Claim discloses no reasonable cause of action.\n\n"
+                    "2. The Court lacks jurisdiction over the subject matter of this action.\n\n"
+                    "3. The Plaintiff lacks standing to bring this action.\n\n"
+                )
+            
+            arguments = case_info.get('arguments', [])
+            if arguments:
+                arguments_block = "".join(f"{i}. {argument}\n\n" for i, argument in enumerate(arguments, 1))
+            else:
+                arguments_block = "1. [State your legal arguments for dismissal]\n\n"
+            
+            # Generate document content
+            content = MOTION_TO_DISMISS_TEMPLATE.substitute(
+                case_number=case_info.get('case_number', 'N/A'),
+                court=case_info.get('court', 'FEDERAL COURT'),
+                plaintiff_upper=case_info.get('plaintiff', 'N/A').upper(),
+                defendant_upper=case_info.get('defendant', 'N/A').upper(),
+                defendant=case_info.get('defendant', 'Defendant'),
+                date_long=date_long,
+                grounds_block=grounds_block,
+                arguments_block=arguments_block
+            )
             
             # Save to file
-            filename = f"Motion_to_Dismiss_{case_info.get('case_number', 'draft').replace('/', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            filename = f"Motion_to_Dismiss_{case_info.get('case_number', 'draft').replace('/', '_')}_{stamp}.txt"
             success, message = safe_save_file(content, filename, OUTPUT_DIR)
             
             if success:
-                logging.info(f"Motion to Dismiss generated: {filename}")
+                logging.info("Motion to Dismiss generated: %s", filename)
                 return True, f"{message}\nPath: {OUTPUT_DIR / filename}"
             else:
                 return False, message
@@ -495,46 +596,29 @@ END OF DOCUMENT
             tuple: (success: bool, result: dict or error message)
         """
         try:
-            import re
-            from datetime import datetime
-            
-            # Common date patterns
-            date_patterns = [
-                r'\b(\d{4}-\d{2}-\d{2})\b',  # YYYY-MM-DD
-                r'\b(\d{1,2}/\d{1,2}/\d{4})\b',  # MM/DD/YYYY or DD/MM/YYYY
-                r'\b(\d{1,2}-\d{1,2}-\d{4})\b',  # MM-DD-YYYY or DD-MM-YYYY
-                r'\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',  # Month DD, YYYY
-            ]
-            
-            events = []
+            # Dedup on (date, line) while scanning - no second pass
+            unique_events = []
+            seen = set()
             
             # Split text into lines
             lines = evidence_text.split('\n')
             
             for line in lines:
-                line = line.strip()
-                if not line:
+                if not line or line.isspace():
                     continue
                 
-                # Try to find dates in the line
-                for pattern in date_patterns:
-                    matches = re.finditer(pattern, line, re.IGNORECASE)
-                    for match in matches:
-                        date_str = match.group(0)
-                        events.append({
-                            'date': date_str,
-                            'description': line,
-                            'position': match.start()
-                        })
-            
-            # Remove duplicates and sort
-            unique_events = []
-            seen = set()
-            for event in events:
-                key = (event['date'], event['description'])
-                if key not in seen:
+                # Try to find dates in the line; only dated lines get trimmed
+                description = None
+                for match in DATE_RE.finditer(line):
+                    if description is None:
+                        description = line.strip()
+                        offset = line.find(description)
+                    date_str = match.group(0)
+                    key = (date_str, description)
+                    if key in seen:
+                        continue
                     seen.add(key)
-                    unique_events.append(event)
+                    unique_events.append(TimelineEvent(date_str, description, match.start() - offset))
             
             result = {
                 'total_events': len(unique_events),
@@ -543,34 +627,40 @@ END OF DOCUMENT
             }
             
             # Save timeline to file
-            timeline_content = f"""
-{'=' * 80}
+            now = datetime.now()
+            generated = now.strftime('%Y-%m-%d %H:%M:%S')
+            stamp = now.strftime('%Y%m%d_%H%M%S')
+            
+            header = f"""
+{SEP}
 EVIDENCE TIMELINE ANALYSIS
-{'=' * 80}
+{SEP}
 
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Generated: {generated}
 Total Events Found: {len(unique_events)}
 
-{'=' * 80}
+{SEP}
 CHRONOLOGICAL EVENTS
-{'=' * 80}
+{SEP}
 
 """
-            for i, event in enumerate(unique_events, 1):
-                timeline_content += f"{i}. Date: {event['date']}\n"
-                timeline_content += f"   Event: {event['description']}\n\n"
-            
-            timeline_content += f"""
-{'=' * 80}
+            footer = f"""
+{SEP}
 END OF TIMELINE
-{'=' * 80}
+{SEP}
 """
             
-            filename = f"Timeline_Analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            success, message = safe_save_file(timeline_content, filename, OUTPUT_DIR)
+            def timeline_chunks():
+                yield header
+                for i, (date, description, _) in enumerate(unique_events, 1):
+                    yield f"{i}. Date: {date}\n   Event: {description}\n\n"
+                yield footer
+            
+            filename = f"Timeline_Analysis_{stamp}.txt"
+            success, message = safe_save_file(timeline_chunks(), filename, OUTPUT_DIR)
             
             if success:
-                logging.info(f"Timeline analysis saved: {filename}")
+                logging.info("Timeline analysis saved: %s", filename)
                 result['file'] = filename
                 result['path'] = str(OUTPUT_DIR / filename)
             
@@ -593,14 +683,18 @@ END OF TIMELINE
             tuple: (success: bool, message: str)
         """
         try:
+            now = datetime.now()
+            generated = now.strftime('%Y-%m-%d %H:%M:%S')
+            stamp = now.strftime('%Y%m%d_%H%M%S')
+            
             if platform.lower() == "twitter":
                 # Generate Twitter/X thread
                 content = f"""
-{'=' * 80}
+{SEP}
 TWITTER/X THREAD - {topic.upper()}
-{'=' * 80}
+{SEP}
 
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Generated: {generated}
 
 THREAD:
 
@@ -623,37 +717,37 @@ THREAD:
 
 8/🧵 This thread will be updated as new information becomes available. Stay informed, stay vigilant.
 
-{'=' * 80}
+{SEP}
 HASHTAGS
-{'=' * 80}
+{SEP}
 
 #Justice #Accountability #Truth #Evidence #Documentation #Legal #Rights
 
-{'=' * 80}
+{SEP}
 END OF THREAD
-{'=' * 80}
+{SEP}
 """
             else:
                 content = f"""
-{'=' * 80}
+{SEP}
 SOCIAL MEDIA POST - {platform.upper()}
-{'=' * 80}
+{SEP}
 
-Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Generated: {generated}
 
 Topic: {topic}
 
 [Content would be customized for {platform}]
 
-{'=' * 80}
+{SEP}
 """
             
             # Save to file
-            filename = f"{platform}_content_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            filename = f"{platform}_content_{stamp}.txt"
             success, message = safe_save_file(content, filename, SOCIAL_DIR)
             
             if success:
-                logging.info(f"Social content generated: {filename}")
+                logging.info("Social content generated: %s", filename)
                 return True, f"{message}\nPath: {SOCIAL_DIR / filename}"
             else:
                 return False, message
@@ -684,33 +778,34 @@ Topic: {topic}
                 return False, "❌ Data must be a non-empty list"
             
             # Basic validation of OHLC format
-            required_fields = ['time', 'open', 'high', 'low', 'close']
             for i, item in enumerate(data):
-                for field in required_fields:
-                    if field not in item:
-                        return False, f"❌ Missing field '{field}' in data item {i}"
+                missing = OHLC_REQUIRED - item.keys()
+                if missing:
+                    fields = ', '.join(f"'{field}'" for field in sorted(missing))
+                    return False, f"❌ Missing field(s) {fields} in data item {i}"
             
             # Generate chart HTML with data
-            chart_template_path = CHARTS_DIR / "chart_template.html"
-            success, template_content = safe_read_file(chart_template_path)
+            success, template_content = self.load_chart_template()
             
             if not success:
                 return False, f"❌ Could not read chart template: {template_content}"
             
-            # Create a custom chart with the data embedded
-            data_json = json.dumps(data, indent=2)
+            # Create a custom chart with the data embedded as a JS string literal
+            data_literal = json.dumps(json.dumps(data, separators=(',', ':')))
             
-            custom_chart = template_content.replace(
-                'document.getElementById(\'dataInput\').value = \'\';',
-                f'document.getElementById(\'dataInput\').value = {json.dumps(data_json)};'
-            )
+            if self._chart_head is None:
+                custom_chart = template_content
+            else:
+                custom_chart = (self._chart_head
+                                + f"document.getElementById('dataInput').value = {data_literal};"
+                                + self._chart_tail)
             
             # Save custom chart
             filename = f"algorithm_chart_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
             success, message = safe_save_file(custom_chart, filename, OUTPUT_DIR)
             
             if success:
-                logging.info(f"Francesco's algorithm chart generated: {filename}")
+                logging.info("Francesco's algorithm chart generated: %s", filename)
                 return True, f"{message}\nPath: {OUTPUT_DIR / filename}\nData points: {len(data)}"
             else:
                 return False, message
@@ -722,23 +817,13 @@ Topic: {topic}
     
     def print_header(self):
         """Print application header"""
-        print(f"\n{Colors.CYAN}{'=' * 80}{Colors.RESET}")
+        print(f"\n{CYAN_SEP}")
         print(f"{Colors.BOLD}{Colors.BLUE}   🔒 AGENT X FORTRESS - LEGAL DOCUMENT GENERATOR v{self.version}{Colors.RESET}")
-        print(f"{Colors.CYAN}{'=' * 80}{Colors.RESET}\n")
+        print(f"{CYAN_SEP}\n")
     
     def print_menu(self):
         """Print main menu"""
-        print(f"{Colors.GREEN}{'=' * 80}{Colors.RESET}")
-        print(f"{Colors.BOLD}MAIN MENU{Colors.RESET}")
-        print(f"{Colors.GREEN}{'=' * 80}{Colors.RESET}")
-        print(f"{Colors.CYAN}1.{Colors.RESET} Generate Form 7A (Statement of Claim)")
-        print(f"{Colors.CYAN}2.{Colors.RESET} Generate Motion to Dismiss")
-        print(f"{Colors.CYAN}3.{Colors.RESET} Analyze Evidence Timeline")
-        print(f"{Colors.CYAN}4.{Colors.RESET} Generate Social Media Content")
-        print(f"{Colors.CYAN}5.{Colors.RESET} Chart System (Francesco's Algorithm Interface)")
-        print(f"{Colors.CYAN}6.{Colors.RESET} System Information")
-        print(f"{Colors.CYAN}7.{Colors.RESET} Exit")
-        print(f"{Colors.GREEN}{'=' * 80}{Colors.RESET}\n")
+        print(MAIN_MENU)
     
     def get_input(self, prompt, required=True):
         """Get user input with optional requirement check"""
@@ -791,7 +876,7 @@ Topic: {topic}
         else:
             print(f"\n{Colors.RED}{message}{Colors.RESET}")
         
-        input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
+        input(PRESS_ENTER)
     
     def menu_motion_to_dismiss(self):
         """Interactive menu for Motion to Dismiss generation"""
@@ -833,25 +918,25 @@ Topic: {topic}
         else:
             print(f"\n{Colors.RED}{message}{Colors.RESET}")
         
-        input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
+        input(PRESS_ENTER)
     
     def menu_timeline_analysis(self):
         """Interactive menu for timeline analysis"""
         print(f"\n{Colors.BOLD}EVIDENCE TIMELINE ANALYSIS{Colors.RESET}\n")
         
         print(f"{Colors.CYAN}Enter evidence text (multi-line, type 'END' on a new line to finish):{Colors.RESET}")
+        # Read pasted evidence straight from the stdin buffer (END or EOF finishes)
         lines = []
-        while True:
-            line = input()
+        for line in iter(sys.stdin.readline, ''):
             if line.strip().upper() == 'END':
                 break
             lines.append(line)
         
-        evidence_text = '\n'.join(lines)
+        evidence_text = ''.join(lines).rstrip('\n')
         
         if not evidence_text.strip():
             print(f"{Colors.RED}No evidence text provided.{Colors.RESET}")
-            input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
+            input(PRESS_ENTER)
             return
         
         print(f"\n{Colors.YELLOW}Analyzing timeline...{Colors.RESET}")
@@ -863,14 +948,14 @@ Topic: {topic}
             if result['total_events'] > 0:
                 print(f"\n{Colors.BOLD}Events:{Colors.RESET}")
                 for i, event in enumerate(result['events'][:10], 1):  # Show first 10
-                    print(f"{i}. {event['date']} - {event['description'][:60]}...")
+                    print(f"{i}. {event.date} - {event.description[:60]}...")
                 if result['total_events'] > 10:
                     print(f"\n{Colors.YELLOW}... and {result['total_events'] - 10} more events{Colors.RESET}")
             print(f"\n{Colors.GREEN}Full timeline saved to: {result.get('path', 'N/A')}{Colors.RESET}")
         else:
             print(f"\n{Colors.RED}{result}{Colors.RESET}")
         
-        input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
+        input(PRESS_ENTER)
     
     def menu_social_content(self):
         """Interactive menu for social media content generation"""
@@ -887,7 +972,7 @@ Topic: {topic}
         else:
             print(f"\n{Colors.RED}{message}{Colors.RESET}")
         
-        input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
+        input(PRESS_ENTER)
     
     def menu_chart_system(self):
         """Interactive menu for chart system"""
@@ -900,17 +985,8 @@ Topic: {topic}
         choice = self.get_input("\nSelect option: ")
         
         if choice == '1':
-            # Sample algorithm data
-            sample_data = [
-                {"time": "2024-01-01", "open": 100, "high": 110, "low": 95, "close": 108, "volume": 50000},
-                {"time": "2024-02-01", "open": 108, "high": 115, "low": 105, "close": 112, "volume": 60000},
-                {"time": "2024-03-01", "open": 112, "high": 120, "low": 110, "close": 118, "volume": 75000},
-                {"time": "2024-04-01", "open": 118, "high": 125, "low": 115, "close": 122, "volume": 80000},
-                {"time": "2024-05-01", "open": 122, "high": 130, "low": 120, "close": 128, "volume": 90000},
-            ]
-            
             print(f"\n{Colors.YELLOW}Generating chart with sample data...{Colors.RESET}")
-            success, message = self.insert_francesco_algorithm(sample_data)
+            success, message = self.insert_francesco_algorithm(SAMPLE_OHLCV)
             
             if success:
                 print(f"\n{Colors.GREEN}{message}{Colors.RESET}")
@@ -925,7 +1001,7 @@ Topic: {topic}
             else:
                 print(f"\n{Colors.RED}Chart template not found at: {chart_path}{Colors.RESET}")
         
-        input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
+        input(PRESS_ENTER)
     
     def menu_system_info(self):
         """Display system information"""
@@ -938,17 +1014,7 @@ Topic: {topic}
         print(f"{Colors.CYAN}Charts Directory:{Colors.RESET} {CHARTS_DIR}")
         
         print(f"\n{Colors.BOLD}Directory Status:{Colors.RESET}")
-        directories = {
-            'Output': OUTPUT_DIR,
-            'Logs': LOGS_DIR,
-            'Templates': TEMPLATES_DIR,
-            'Evidence': EVIDENCE_DIR,
-            'Social': SOCIAL_DIR,
-            'Charts': CHARTS_DIR,
-            'Config': CONFIG_DIR
-        }
-        
-        for name, path in directories.items():
+        for name, path in APP_DIRECTORIES.items():
             status = f"{Colors.GREEN}✓{Colors.RESET}" if path.exists() else f"{Colors.RED}✗{Colors.RESET}"
             print(f"  {status} {name}: {path}")
         
@@ -958,7 +1024,7 @@ Topic: {topic}
         print(f"{Colors.GREEN}✅ Fix #3:{Colors.RESET} Error Handling - safe_save_file() implemented")
         print(f"{Colors.GREEN}✅ Fix #4:{Colors.RESET} Path Validation - All file operations validated")
         
-        input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
+        input(PRESS_ENTER)
     
     def run(self):
         """Main application loop"""
@@ -987,14 +1053,14 @@ Topic: {topic}
                     break
                 else:
                     print(f"{Colors.RED}Invalid option. Please try again.{Colors.RESET}")
-                    input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
+                    input(PRESS_ENTER)
         
         except KeyboardInterrupt:
             print(f"\n\n{Colors.YELLOW}Application interrupted by user.{Colors.RESET}\n")
             logging.info("Application interrupted by user (Ctrl+C)")
         except Exception as e:
             print(f"\n{Colors.RED}Fatal error: {str(e)}{Colors.RESET}\n")
-            logging.error(f"Fatal error in main loop: {str(e)}", exc_info=True)
+            logging.error("Fatal error in main loop: %s", e, exc_info=True)
 
 def main():
     """Main entry point"""
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Coqui TTS helpers shared by the Agent X voice front ends.
+Dynamic INT8 quantization of the Coqui model for CPU inference.
+"""
+
+
+def linear_from_conv1d(model):
+    """Swap transformers' Conv1D layers for equivalent nn.Linear; returns the count.
+
+    XTTS's GPT-2 decoder is built from Conv1D (a Linear with a transposed
+    weight), which quantize_dynamic does not recognize.
+    """
+    import torch
+    try:
+        from transformers.pytorch_utils import Conv1D
+    except ImportError:
+        return 0
+
+    converted = 0
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features, device='meta')
+                linear.weight = torch.nn.Parameter(child.weight.detach().t().contiguous())
+                linear.bias = child.bias
+                setattr(parent, name, linear)
+                converted += 1
+    return converted
+
+
+def quantize_coqui(tts):
+    """Quantize a loaded Coqui TTS model to INT8 in place; returns the Conv1D count converted"""
+    import torch
+    model = tts.synthesizer.tts_model
+    converted = linear_from_conv1d(model)
+    # In place, so the float model isn't held twice while converting
+    torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return converted
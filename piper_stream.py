@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Persistent Piper TTS pipeline shared by the Agent X voice front ends.
+Piper loads the voice once and synthesizes one sentence per stdin line
+into a WAV file, printing the file's path on stdout once it is written.
+"""
+
+import atexit
+import collections
+import hashlib
+import json
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from pathlib import Path
+
+WAV_TIMEOUT = 2.0  # seconds to wait for a reported WAV to hold all of its frames
+STDERR_LINES = 20  # recent Piper log lines kept for error messages
+
+
+def piper_sample_rate(piper_model):
+    """Read the output sample rate from the voice's .onnx.json config"""
+    try:
+        with open(f"{piper_model}.json") as f:
+            return json.load(f)['audio']['sample_rate']
+    except (OSError, KeyError, ValueError):
+        return 22050
+
+
+def read_wav_frames(path):
+    """Return (pcm, complete): the WAV's frames, and whether all the header declares were there"""
+    with wave.open(str(path), 'rb') as w:
+        expected = w.getnframes() * w.getsampwidth() * w.getnchannels()
+        pcm = w.readframes(w.getnframes())
+    return pcm, len(pcm) == expected
+
+
+class PiperStream:
+    """One Piper process plus the output stream its audio plays on"""
+
+    def __init__(self, binary, model, cache_dir=None):
+        self.binary = binary
+        self.model = model
+        self.cache_dir = cache_dir  # rendered sentences are kept here when set
+        self.sample_rate = piper_sample_rate(model)
+        self.proc = None
+        self.stream = None
+        self.out_dir = None
+        self.stderr_thread = None
+        self.stderr_tail = collections.deque(maxlen=STDERR_LINES)
+        self.pcm_queue = queue.Queue()
+        atexit.register(self.stop)
+
+    def start(self):
+        """Launch Piper once, writing one WAV per sentence, and open the output stream"""
+        if self.proc is not None and self.proc.poll() is None:
+            return self.proc
+
+        import sounddevice as sd
+
+        self.stop()
+        stream = sd.RawOutputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype='int16'
+        )
+        try:
+            stream.start()
+        except Exception:
+            stream.close()
+            raise
+        # The player runs as soon as the stream exists, so stop() can always drain it
+        self.stream = stream
+        threading.Thread(target=self._play_audio, args=(stream,), daemon=True).start()
+        try:
+            self.out_dir = tempfile.mkdtemp(prefix="piper-")
+            self.proc = subprocess.Popen(
+                [str(self.binary), '--model', str(self.model), '--output_dir', self.out_dir],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                bufsize=0
+            )
+        except OSError:
+            self.stop()
+            raise
+        # Piper logs every utterance: keep the pipe drained so it can never block on it
+        self.stderr_thread = threading.Thread(target=self._drain_stderr, args=(self.proc,), daemon=True)
+        self.stderr_thread.start()
+        return self.proc
+
+    def stop(self):
+        """Shut down the Piper process and output stream"""
+        if self.proc is not None:
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=2)
+            except Exception:
+                self.proc.kill()
+        if self.stderr_thread is not None:
+            self.stderr_thread.join(timeout=2)
+        if self.stream is not None:
+            self.pcm_queue.put(None)
+            self.pcm_queue.join()
+            try:
+                self.stream.stop()
+                self.stream.close()
+            except Exception:
+                pass
+        if self.out_dir is not None:
+            shutil.rmtree(self.out_dir, ignore_errors=True)
+        self.proc = None
+        self.stream = None
+        self.out_dir = None
+        self.stderr_thread = None
+
+    def _drain_stderr(self, proc):
+        """Read Piper's log continuously, keeping the last few lines for errors"""
+        for line in proc.stderr:
+            self.stderr_tail.append(line.decode('utf-8', 'replace').rstrip())
+
+    def _play_audio(self, stream):
+        """Playback thread: write queued PCM blocks to the output stream"""
+        while True:
+            block = self.pcm_queue.get()
+            try:
+                if block is None:
+                    return
+                stream.write(block)
+            finally:
+                self.pcm_queue.task_done()
+
+    def play(self, pcm):
+        """Queue already rendered PCM for playback"""
+        self.start()
+        self.pcm_queue.put(pcm)
+
+    def wait(self):
+        """Block until everything queued has been played"""
+        self.pcm_queue.join()
+
+    def say(self, sentence):
+        """Synthesize one sentence and queue it for playback.
+
+        Returns the sentence's PCM when it is known to be complete, or None
+        when it isn't (the audio still plays, but must not be cached).
+        """
+        proc = self.start()
+        proc.stdin.write(sentence.replace('\n', ' ').encode('utf-8') + b'\n')
+
+        # Piper prints the WAV's path only after writing it: that line ends the utterance
+        for line in proc.stdout:
+            path = Path(line.decode('utf-8', 'replace').strip())
+            if path.suffix == '.wav':
+                break
+        else:
+            self.stderr_thread.join(timeout=1)  # let the last log lines in
+            log = self.stderr_tail[-1] if self.stderr_tail else "no output"
+            raise RuntimeError(f"Piper process exited ({log})")
+
+        # The header carries the frame count, so a short read is detected exactly
+        try:
+            deadline = time.monotonic() + WAV_TIMEOUT
+            while True:
+                try:
+                    pcm, complete = read_wav_frames(path)
+                except (EOFError, wave.Error):
+                    pcm, complete = b'', False  # header not flushed yet
+                if complete or time.monotonic() >= deadline:
+                    break
+                time.sleep(0.01)
+        finally:
+            path.unlink(missing_ok=True)
+
+        self.pcm_queue.put(pcm)
+        return pcm if complete else None
+
+    def cache_path(self, sentence):
+        """Cache file for a sentence rendered with this voice"""
+        # "v2": renders cached before completeness checks could be cut off, so they're not reused
+        key = hashlib.blake2b(f"v2\0{self.model}\0{sentence}".encode('utf-8'), digest_size=16).hexdigest()
+        return Path(self.cache_dir) / f"{key}.pcm"
+
+    def say_cached(self, sentence):
+        """Replay a previously rendered sentence, or synthesize and cache it"""
+        if self.cache_dir is None:
+            self.say(sentence)
+            return
+        path = self.cache_path(sentence)
+        if path.exists():
+            self.play(path.read_bytes())
+            return
+
+        # Only audio Piper confirmed as complete is cached; a cut-off take would replay forever
+        pcm = self.say(sentence)
+        if pcm:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(pcm)
+            except OSError:
+                pass
@@ -5,8 +5,9 @@ Direct conversation with Qwen2.5 AI model
 No audio requirements - pure text interaction
 """
 
-import subprocess
+import json
 import sys
+import requests
 
 print("""
 ============================================================
@@ -18,13 +19,23 @@ Commands: Type 'exit', 'quit', or press Ctrl+C to stop
 ============================================================
 """)
 
+# One keep-alive HTTP connection to Ollama for the whole session
+OLLAMA_URL = "http://127.0.0.1:11434"
+session = requests.Session()
+model = "qwen2.5:7b-instruct-q4_K_M"
+
 # Verify Ollama is running
-result = subprocess.run("ollama list", shell=True, capture_output=True, text=True)
-if result.returncode != 0:
+try:
+    result = session.get(f"{OLLAMA_URL}/api/tags", timeout=5)
+except requests.RequestException:
+    result = None
+if result is None or result.status_code != 200:
     print("❌ Ollama is not running. Start it with: ollama serve")
     sys.exit(1)
 
-if "qwen2.5" not in result.stdout:
+# Installed model names, fetched once for the session
+models = {m["name"] for m in result.json().get("models", [])}
+if model not in models:
     print("❌ Qwen2.5 model not found. Install it with:")
     print("   ollama pull qwen2.5:7b-instruct-q4_K_M")
     sys.exit(1)
@@ -33,8 +44,6 @@ print("✅ Connected to Ollama")
 print("✅ Qwen2.5 model ready\n")
 print("Type your question below:\n")
 
-model = "qwen2.5:7b-instruct-q4_K_M"
-
 while True:
     try:
         # Get user input
@@ -50,19 +59,26 @@ while True:
         
         # Query Ollama
         print("\n🤔 AI is thinking...\n")
-        cmd = f'ollama run {model} "{user_input}"'
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=120)
-        
-        if result.returncode == 0:
-            response = result.stdout.strip()
-            print(f"🤖 AI: {response}\n")
-        else:
-            print(f"❌ Error: {result.stderr}\n")
+        # Stream tokens to the terminal as they are generated
+        with session.post(
+            f"{OLLAMA_URL}/api/generate",
+            json={"model": model, "prompt": user_input, "stream": True, "keep_alive": "30m"},
+            stream=True,
+            timeout=120
+        ) as result:
+            if result.status_code == 200:
+                print("🤖 AI: ", end="", flush=True)
+                for line in result.iter_lines():
+                    if line:
+                        print(json.loads(line).get("response", ""), end="", flush=True)
+                print("\n")
+            else:
+                print(f"❌ Error: {result.text}\n")
             
     except KeyboardInterrupt:
         print("\n\n👋 Interrupted. Goodbye!\n")
         break
-    except subprocess.TimeoutExpired:
+    except requests.Timeout:
         print("\n❌ Response timeout (>2 minutes). Try a shorter question.\n")
     except Exception as e:
         print(f"\n❌ Error: {e}\n")
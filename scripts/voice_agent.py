@@ -8,7 +8,12 @@ Integrated with Ollama for offline AI processing
 import os
 import sys
 import subprocess
+import importlib.util
 import json
+import hashlib
+import shutil
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Color codes
@@ -18,31 +23,52 @@ RED = '\033[0;31m'
 BLUE = '\033[0;34m'
 NC = '\033[0m'
 
+# Ollama HTTP API (keep-alive connection instead of `ollama run` per prompt)
+OLLAMA_URL = "http://127.0.0.1:11434"
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Rendered WAVs for the agent's fixed phrases, reused across runs
+TTS_MODEL = "tts_models/en/ljspeech/tacotron2-DDC"
+TTS_CACHE_DIR = Path.home() / "fortress-ai" / "tts_cache"
+FIXED_PHRASES = {
+    "Voice agent shutting down. Goodbye.",
+    "Voice integration test successful. All systems operational.",
+    "Voice integration test successful.",
+}
+
 def check_dependencies():
     """Verify all required packages are installed"""
     print(f"{BLUE}[VOICE AGENT] Checking dependencies...{NC}")
     
     required_packages = {
-        'openai-whisper': 'whisper',
         'TTS': 'TTS',
         'sounddevice': 'sounddevice',
         'numpy': 'numpy',
         'pydantic': 'pydantic'
     }
     
+    # find_spec locates each package without running its (torch-heavy) import
     missing = []
     for pip_name, import_name in required_packages.items():
-        try:
-            __import__(import_name)
+        if importlib.util.find_spec(import_name) is not None:
             print(f"{GREEN}✓{NC} {import_name}")
-        except ImportError:
+        else:
             missing.append(pip_name)
             print(f"{RED}✗{NC} {import_name} (missing)")
     
+    # Either speech-to-text backend will do: faster-whisper (INT8) is used when
+    # present, otherwise openai-whisper, which is what gets installed if neither is
+    stt_backend = next((name for name in ("faster_whisper", "whisper")
+                        if importlib.util.find_spec(name) is not None), None)
+    if stt_backend:
+        print(f"{GREEN}✓{NC} {stt_backend}")
+    else:
+        missing.append('openai-whisper')
+        print(f"{RED}✗{NC} whisper (missing)")
+    
     if missing:
         print(f"\n{YELLOW}Installing missing packages...{NC}")
-        cmd = f"pip install --quiet --no-input {' '.join(missing)}"
-        subprocess.run(cmd, shell=True, check=False)
+        subprocess.run([sys.executable, "-m", "pip", "install", "--quiet", "--no-input", *missing], check=False)
         print(f"{GREEN}✓ Installation complete{NC}\n")
     else:
         print(f"{GREEN}✓ All dependencies available{NC}\n")
@@ -57,40 +83,72 @@ class VoiceAgent:
         # Check dependencies first
         check_dependencies()
         
-        # Load models
-        print(f"{BLUE}[VOICE AGENT] Loading AI models...{NC}")
+        self.ollama_model = "qwen2.5:7b-instruct-q4_K_M"
+        self.ollama_session = requests.Session()
         
+        # Resolve the audio player once rather than probing on every utterance
+        self.player = next(filter(None, map(shutil.which, ("aplay", "afplay", "paplay"))), None)
+        
+        # Microphone stream, opened on first listen() and reused every turn
+        self.input_stream = None
+        
+        # Load models and verify Ollama concurrently (wall time = slowest, not sum)
+        print(f"{BLUE}[VOICE AGENT] Loading AI models...{NC}")
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            whisper_future = pool.submit(self.load_whisper)
+            tts_future = pool.submit(self.load_tts)
+            ollama_future = pool.submit(self.verify_ollama)
+            self.whisper = whisper_future.result()
+            self.tts = tts_future.result()
+            ollama_future.result()
+        print(f"{GREEN}✓ Ollama model: {self.ollama_model}{NC}\n")
+    
+    def load_whisper(self):
+        """Load the Whisper STT model (INT8 faster-whisper when installed)"""
         try:
-            import whisper
-            print(f"{YELLOW}Loading Whisper (Speech-to-Text)...{NC}")
-            self.whisper = whisper.load_model("base")  # Use 'base' for faster inference
+            try:
+                from faster_whisper import WhisperModel
+                print(f"{YELLOW}Loading Whisper (Speech-to-Text, faster-whisper int8)...{NC}")
+                model = WhisperModel("base", device="auto", compute_type="int8")
+            except ImportError:
+                import whisper
+                print(f"{YELLOW}Loading Whisper (Speech-to-Text)...{NC}")
+                model = whisper.load_model("base")  # Use 'base' for faster inference
             print(f"{GREEN}✓ Whisper loaded{NC}")
+            return model
         except Exception as e:
             print(f"{RED}✗ Failed to load Whisper: {e}{NC}")
-            self.whisper = None
-        
+            return None
+    
+    def load_tts(self):
+        """Load the Coqui TTS model"""
         try:
             from TTS.api import TTS
             print(f"{YELLOW}Loading Coqui TTS (Text-to-Speech)...{NC}")
-            self.tts = TTS(model_name="tts_models/en/ljspeech/tacotron2-DDC", progress_bar=False)
+            tts = TTS(model_name=TTS_MODEL, progress_bar=False)
             print(f"{GREEN}✓ TTS loaded{NC}")
+            return tts
         except Exception as e:
             print(f"{RED}✗ Failed to load TTS: {e}{NC}")
-            self.tts = None
-        
-        self.ollama_model = "qwen2.5:7b-instruct-q4_K_M"
-        print(f"{GREEN}✓ Ollama model: {self.ollama_model}{NC}\n")
-        
-        # Verify Ollama is running
-        self.verify_ollama()
+            return None
+    
+    def list_models(self):
+        """Return the set of installed Ollama model names, or None if the server is unreachable"""
+        try:
+            result = self.ollama_session.get(f"{OLLAMA_URL}/api/tags", timeout=5)
+            if result.status_code != 200:
+                return None
+            return {m["name"] for m in result.json().get("models", [])}
+        except (requests.RequestException, ValueError):
+            return None
     
     def verify_ollama(self):
         """Check if Ollama is running"""
         print(f"{BLUE}[VOICE AGENT] Verifying Ollama...{NC}")
-        result = subprocess.run("ollama list", shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
+        self.models = self.list_models()
+        if self.models is not None:
             print(f"{GREEN}✓ Ollama is running{NC}")
-            if "qwen2.5" in result.stdout:
+            if self.ollama_model in self.models:
                 print(f"{GREEN}✓ Qwen2.5 model available{NC}\n")
             else:
                 print(f"{YELLOW}⚠ Qwen2.5 model not found{NC}\n")
@@ -103,13 +161,16 @@ class VoiceAgent:
         """Record audio from microphone"""
         try:
             import sounddevice as sd
+            if self.input_stream is None:
+                self.input_stream = sd.InputStream(samplerate=16000, channels=1, dtype='float32')
             print(f"{YELLOW}🎤 Listening for {duration}s...{NC}")
-            audio = sd.rec(int(duration * 16000), 
-                          samplerate=16000, 
-                          channels=1, 
-                          dtype='float32')
-            sd.wait()
-            return audio.flatten()
+            # start/stop only toggles capture; the device stays open between turns
+            self.input_stream.start()
+            try:
+                audio, _ = self.input_stream.read(int(duration * 16000))
+            finally:
+                self.input_stream.stop()
+            return audio.ravel()
         except Exception as e:
             print(f"{RED}✗ Audio recording failed: {e}{NC}")
             return None
@@ -121,8 +182,13 @@ class VoiceAgent:
         
         try:
             print(f"{YELLOW}🔄 Transcribing audio...{NC}")
-            result = self.whisper.transcribe(audio, fp16=False)
-            text = result["text"].strip()
+            if type(self.whisper).__module__.startswith("faster_whisper"):
+                segments, _ = self.whisper.transcribe(audio, beam_size=1)
+                text = " ".join(seg.text for seg in segments).strip()
+            else:
+                # Half precision only pays off (and only works) on GPU
+                result = self.whisper.transcribe(audio, fp16=self.whisper.device.type == "cuda")
+                text = result["text"].strip()
             print(f"{GREEN}✓ Transcribed: {text}{NC}")
             return text
         except Exception as e:
@@ -133,26 +199,39 @@ class VoiceAgent:
         """Send query to Ollama"""
         try:
             print(f"{YELLOW}🤔 Querying AI model...{NC}")
-            cmd = f'ollama run {self.ollama_model} "{prompt}"'
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=60)
+            result = self.ollama_session.post(
+                f"{OLLAMA_URL}/api/generate",
+                json={
+                    "model": self.ollama_model,
+                    "prompt": prompt,
+                    "stream": False,
+                    "keep_alive": OLLAMA_KEEP_ALIVE
+                },
+                timeout=60
+            )
             
-            if result.returncode == 0:
-                response = result.stdout.strip()
+            if result.status_code == 200:
+                response = result.json().get("response", "").strip()
                 print(f"{GREEN}✓ AI Response received{NC}")
                 return response
             else:
                 print(f"{RED}✗ AI query failed{NC}")
                 return None
-        except subprocess.TimeoutExpired:
+        except requests.Timeout:
             print(f"{RED}✗ AI response timeout{NC}")
             return None
         except Exception as e:
             print(f"{RED}✗ Error querying AI: {e}{NC}")
             return None
     
+    def tts_cache_path(self, text):
+        """Cache file for a fixed phrase rendered with the loaded TTS model"""
+        key = hashlib.blake2b(f"{TTS_MODEL}\0{text}".encode(), digest_size=16).hexdigest()
+        return TTS_CACHE_DIR / f"{key}.wav"
+    
     def speak(self, text):
         """Convert text to speech"""
-        if not self.tts:
+        if not self.tts or not text.strip():
             print(f"{BLUE}[AI RESPONSE]{NC}\n{text}\n")
             return
         
@@ -160,15 +239,19 @@ class VoiceAgent:
             print(f"\n{BLUE}🔊 AI Response:{NC}")
             print(f"{GREEN}{text}{NC}\n")
             
-            # Save and play audio
-            audio_file = "/tmp/fortress_response.wav"
-            self.tts.tts_to_file(text=text, file_path=audio_file)
+            # Fixed phrases are synthesized once and replayed from disk
+            if text in FIXED_PHRASES:
+                audio_file = str(self.tts_cache_path(text))
+                if not os.path.exists(audio_file):
+                    TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                    self.tts.tts_to_file(text=text, file_path=audio_file)
+            else:
+                audio_file = "/tmp/fortress_response.wav"
+                self.tts.tts_to_file(text=text, file_path=audio_file)
             
-            # Try to play audio (cross-platform)
-            for cmd in ["aplay", "afplay", "paplay"]:
-                if subprocess.run(f"which {cmd}", shell=True, capture_output=True).returncode == 0:
-                    subprocess.run(f"{cmd} {audio_file}", shell=True, stderr=subprocess.DEVNULL)
-                    break
+            # Play audio with the player found at startup (cross-platform)
+            if self.player:
+                subprocess.run([self.player, audio_file], stderr=subprocess.DEVNULL)
         except Exception as e:
             print(f"{YELLOW}⚠ Text-to-speech failed: {e}{NC}")
             print(f"{BLUE}[AI RESPONSE]{NC}\n{text}\n")
@@ -230,8 +313,7 @@ class VoiceAgent:
         
         # Test Ollama
         print(f"{BLUE}Test 1: Ollama Connection{NC}")
-        result = subprocess.run("ollama list", shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
+        if self.list_models() is not None:
             print(f"{GREEN}✓ Ollama connected{NC}\n")
         else:
             print(f"{RED}✗ Ollama connection failed{NC}\n")
@@ -6,49 +6,247 @@ Flask backend for Fortress AI web interface
 NOW WITH RAG DOCUMENT SEARCH
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, g, stream_with_context
 import subprocess
 import os
+import hashlib
 import json
+import multiprocessing
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import requests
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from werkzeug.utils import secure_filename
 
+# orjson (optional) serializes log records, API responses and stream events in C
+try:
+    import orjson
+    from flask.json.provider import DefaultJSONProvider
+
+    def json_line(obj):
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode("utf-8")
+
+    json_loads = orjson.loads
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider so jsonify() and request.get_json() go through orjson"""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+except ImportError:
+    OrjsonProvider = None
+
+    def json_line(obj):
+        return (json.dumps(obj) + "\n").encode("utf-8")
+
+    json_dumps = json.dumps
+    json_loads = json.loads
+
 app = Flask(__name__)
+if OrjsonProvider is not None:
+    app.json = OrjsonProvider(app)
 
 # Configuration
 FORTRESS_DIR = Path.home() / "fortress-ai"
 # Check for Ollama binary - prefer environment variable, then system PATH, then local install
-if os.environ.get("OLLAMA_BIN"):
-    OLLAMA_BIN = Path(os.environ.get("OLLAMA_BIN"))
-else:
-    try:
-        result = subprocess.run(["which", "ollama"], capture_output=True, text=True, timeout=2)
-        if result.returncode == 0 and result.stdout.strip():
-            OLLAMA_BIN = Path(result.stdout.strip())
-        else:
-            OLLAMA_BIN = FORTRESS_DIR / "bin" / "ollama"
-    except Exception:
-        OLLAMA_BIN = FORTRESS_DIR / "bin" / "ollama"
+OLLAMA_BIN = Path(os.environ.get("OLLAMA_BIN") or shutil.which("ollama") or FORTRESS_DIR / "bin" / "ollama")
 
 CONVERSATION_DIR = FORTRESS_DIR / "logs" / "conversations"
 EVIDENCE_DIR = FORTRESS_DIR / "evidence"
 UPLOAD_DIR = EVIDENCE_DIR / "uploads"
+UPLOAD_TMP_DIR = FORTRESS_DIR / "tmp" / "uploads"  # partial uploads, outside the indexed tree
 VECTOR_DB_DIR = FORTRESS_DIR / "vector_db"
+EMBED_CACHE_DB = VECTOR_DB_DIR / "embed_cache.sqlite"  # chunk vectors keyed by content hash
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
 MODEL_NAME = "qwen2.5:7b-instruct-q4_K_M"
+OLLAMA_URL = "http://127.0.0.1:11434"
+OLLAMA_KEEP_ALIVE = "30m"  # keep the model weights loaded between chat turns
+OLLAMA_TIMEOUT = (10, 90)  # (connect, read) seconds for generate calls
+OLLAMA_NUM_PARALLEL = int(os.environ.get("OLLAMA_NUM_PARALLEL", "8"))  # concurrent prompts batched per forward pass
 ALLOWED_EXTENSIONS = {'pdf', 'txt', 'md', 'html', 'mhtml', 'doc', 'docx', 'jpg', 'jpeg', 'png', 'zip'}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB in bytes
+# Werkzeug refuses larger request bodies before parsing/spooling them (slack for multipart headers)
+app.config["MAX_CONTENT_LENGTH"] = MAX_FILE_SIZE + 64 * 1024
+IVF_MIN_CHUNKS = 10000  # below this an exact flat FAISS scan is already fast
+# Rust tokenizers' own thread pool would contend with torch, and warns when the ingest pool forks
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 
 # Ensure directories exist
 CONVERSATION_DIR.mkdir(parents=True, exist_ok=True)
 EVIDENCE_DIR.mkdir(parents=True, exist_ok=True)
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+UPLOAD_TMP_DIR.mkdir(parents=True, exist_ok=True)
 
-# Current conversation storage
-current_conversation = []
+# Conversation storage, one bounded history per browser session (session_id cookie).
+# Least recently used sessions are dropped past MAX_SESSIONS; their turns are already logged.
+MAX_HISTORY = 200
+MAX_SESSIONS = 500
+sessions = OrderedDict()
+sessions_lock = threading.Lock()
+
+# Single writer thread keeps log appends ordered and off the request path
+log_executor = ThreadPoolExecutor(max_workers=1)
 
 # RAG System
 rag_system = None
+embeddings_model = None  # loaded once, shared by search and ingestion
+ingest_lock = threading.Lock()  # one index mutation at a time
+
+# Uploaded files waiting to be indexed, drained by one background worker
+ingest_queue = queue.Queue()
+ingest_state = {"last_completed": None, "last_success": None}
+file_ingest_state = {}  # upload path -> "queued" | "indexed" | "failed"
+
+# Content digest -> stored upload, so a renamed copy is still recognised as a duplicate
+upload_digests = None  # built from UPLOAD_DIR on first upload
+upload_lock = threading.Lock()
+
+# Persistent HTTP session - reuses keep-alive connections to the Ollama server,
+# one per concurrent request so parallel queries reach Ollama together
+ollama_session = requests.Session()
+ollama_session.mount(OLLAMA_URL, requests.adapters.HTTPAdapter(pool_maxsize=OLLAMA_NUM_PARALLEL))
+
+# Cached Ollama liveness probe (seconds)
+OLLAMA_STATUS_TTL = 5
+_status_cache = {"t": 0.0, "ok": False}
+
+# Cached evidence file count for status polls (seconds; reset on upload)
+DOC_COUNT_TTL = 5
+_doc_count_cache = {"t": 0.0, "n": 0}
+
+def get_embeddings():
+    """Return the shared sentence-transformer embeddings, loading them on first use"""
+    global embeddings_model
+    if embeddings_model is None:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings_model = HuggingFaceEmbeddings(
+            model_name=EMBED_MODEL_NAME,
+            encode_kwargs={"batch_size": 64}  # larger mini-batches when embedding chunks
+        )
+        # On a GPU, half precision halves the matmul cost; CPU inference stays fp32
+        if embeddings_model.client.device.type == "cuda":
+            embeddings_model.client.half()
+    return embeddings_model
+
+
+def limit_compute_threads():
+    """Split the cores between torch and FAISS so neither oversubscribes the CPU"""
+    threads = max(1, (os.cpu_count() or 2) // 2)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    try:
+        import faiss
+        faiss.omp_set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+@lru_cache(maxsize=512)
+def embed_query_cached(normalized_prompt):
+    """Embed a normalized prompt once; repeated questions skip the MiniLM forward pass"""
+    return tuple(get_embeddings().embed_query(normalized_prompt))
+
+
+def embed_documents_cached(texts, embeddings):
+    """Embed chunks as a float32 matrix, only running the model on chunks not seen before"""
+    import sqlite3
+    import numpy as np
+    
+    # The model name is part of the key so switching models never reuses stale vectors
+    keys = [hashlib.sha256(f"{EMBED_MODEL_NAME}\0{text}".encode()).digest() for text in texts]
+    VECTOR_DB_DIR.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(EMBED_CACHE_DB)) as db:
+        db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vec BLOB)")
+        
+        cached = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), 500):  # stay under SQLite's bound-parameter limit
+            batch = unique_keys[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            cached.update(db.execute(f"SELECT key, vec FROM embeddings WHERE key IN ({placeholders})", batch))
+        
+        misses = {key: text for key, text in zip(keys, texts) if key not in cached}
+        if misses:
+            vectors = embeddings.embed_documents(list(misses.values()))
+            fresh = {key: np.asarray(vec, dtype=np.float32).tobytes() for key, vec in zip(misses, vectors)}
+            with db:
+                db.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?)", fresh.items())
+            cached.update(fresh)
+    
+    print(f"🧮 Embedded {len(misses)} new chunks ({len(texts) - len(misses)} reused)")
+    rows = bytearray(b"".join(cached[key] for key in keys))
+    return np.frombuffer(rows, dtype=np.float32).reshape(len(texts), -1)
+
+
+def load_vector_store():
+    """Open the saved FAISS store, memory-mapping the index instead of reading it into RAM"""
+    import pickle
+    import faiss
+    from langchain_community.vectorstores import FAISS
+    
+    index_path = VECTOR_DB_DIR / "index.faiss"
+    
+    # Ask the kernel to start reading the whole file now, so the first searches
+    # hit a warm page cache instead of faulting pages in one at a time
+    if hasattr(os, "posix_fadvise"):
+        fd = os.open(index_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    
+    # Inverted lists are mapped from the file and paged in on demand
+    index = faiss.read_index(
+        str(index_path),
+        faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    )
+    # Same sidecar FAISS.save_local writes (trusted: produced by ingest_documents)
+    with open(VECTOR_DB_DIR / "index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(get_embeddings(), index, docstore, index_to_docstore_id)
+
+
+def iter_files(root):
+    """Yield an os.DirEntry for each file (name with an extension) under root"""
+    try:
+        entries = os.scandir(root)
+    except FileNotFoundError:
+        return
+    # DirEntry carries the type from the directory read itself - no stat per entry
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file() and "." in entry.name:
+                yield entry
+
+
+def document_count():
+    """Number of evidence files, rescanned at most every DOC_COUNT_TTL seconds"""
+    now = time.monotonic()
+    if now - _doc_count_cache["t"] >= DOC_COUNT_TTL:
+        _doc_count_cache["n"] = sum(1 for _ in iter_files(EVIDENCE_DIR))
+        _doc_count_cache["t"] = now
+    return _doc_count_cache["n"]
+
 
 def init_rag_system():
     """Initialize RAG system (lazy loading)"""
@@ -56,16 +254,18 @@ def init_rag_system():
     if rag_system is None:
         try:
             from langchain_community.vectorstores import FAISS
-            from langchain_community.embeddings import HuggingFaceEmbeddings
             
             # Check if vector DB exists
             if VECTOR_DB_DIR.exists() and (VECTOR_DB_DIR / "index.faiss").exists():
-                embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-                rag_system = FAISS.load_local(
-                    str(VECTOR_DB_DIR),
-                    embeddings,
-                    allow_dangerous_deserialization=True
-                )
+                try:
+                    rag_system = load_vector_store()
+                except Exception as e:
+                    print(f"⚠️  Memory-mapped index load failed ({e}), reading it normally")
+                    rag_system = FAISS.load_local(
+                        str(VECTOR_DB_DIR),
+                        get_embeddings(),
+                        allow_dangerous_deserialization=True
+                    )
                 print("✅ RAG system loaded")
                 return True
             else:
@@ -81,28 +281,20 @@ def init_rag_system():
 
 
 def check_ollama_running():
-    """Check if Ollama server is running and responding"""
+    """Check if Ollama server is accepting connections (cached for a few seconds)"""
+    now = time.monotonic()
+    if now - _status_cache["t"] < OLLAMA_STATUS_TTL:
+        return _status_cache["ok"]
+    
+    # HEAD on the API over the pooled keep-alive connection: proves it's Ollama answering
     try:
-        # First check if process is running
-        result = subprocess.run(
-            ["pgrep", "-f", "ollama"],
-            capture_output=True,
-            text=True,
-            timeout=2
-        )
-        if result.returncode != 0:
-            return False
-        
-        # Also verify API is responding
-        try:
-            import requests
-            response = requests.get("http://127.0.0.1:11434/api/tags", timeout=2)
-            return response.status_code == 200
-        except:
-            # Process is running but API not ready yet
-            return True
-    except Exception:
-        return False
+        ok = ollama_session.head(f"{OLLAMA_URL}/api/tags", timeout=0.3).status_code == 200
+    except requests.RequestException:
+        ok = False
+    
+    _status_cache["t"] = now
+    _status_cache["ok"] = ok
+    return ok
 
 
 def start_ollama():
@@ -111,16 +303,19 @@ def start_ollama():
         try:
             # Start Ollama in background
             log_file = FORTRESS_DIR / "logs" / "ollama-server.log"
+            # Let the server batch concurrent /api/query requests into one forward pass
+            env = dict(os.environ, OLLAMA_NUM_PARALLEL=str(OLLAMA_NUM_PARALLEL))
             with open(log_file, "a") as f:
                 subprocess.Popen(
                     [str(OLLAMA_BIN), "serve"],
                     stdout=f,
                     stderr=f,
+                    env=env,
                     start_new_session=True
                 )
-            # Wait for startup
-            import time
+            # Wait for startup, then force a fresh probe
             time.sleep(3)
+            _status_cache["t"] = 0.0
             return True
         except Exception as e:
             print(f"Failed to start Ollama: {e}")
@@ -128,30 +323,22 @@ def start_ollama():
     return True
 
 
-def query_ollama(prompt, use_rag=True):
-    """Query Ollama with optional RAG enhancement"""
+def warm_ollama():
+    """Load the model into Ollama ahead of the first user query"""
     try:
-        # Check if Ollama is running
-        if not check_ollama_running():
-            return "Error: Ollama server is not running. Please start it with: ollama serve"
-        
-        # RAG Enhancement
-        context = ""
-        sources = []
-        if use_rag and init_rag_system() and rag_system is not None:
-            try:
-                # Search for relevant documents
-                docs = rag_system.similarity_search(prompt, k=3)
-                if docs:
-                    context_parts = []
-                    for i, doc in enumerate(docs, 1):
-                        context_parts.append(f"[Source {i}: {doc.metadata.get('source', 'Unknown')}]\n{doc.page_content}")
-                        sources.append(doc.metadata.get('source', 'Unknown'))
-                    
-                    context = "\n\n---\n\n".join(context_parts)
-                    
-                    # Enhance prompt with context
-                    prompt = f"""You are a legal AI assistant with access to evidence documents.
+        # An empty prompt makes Ollama load the weights without generating anything
+        ollama_session.post(
+            f"{OLLAMA_URL}/api/generate",
+            json={"model": MODEL_NAME, "prompt": "", "keep_alive": OLLAMA_KEEP_ALIVE},
+            timeout=120
+        )
+        print(f"✅ Model {MODEL_NAME} preloaded")
+    except Exception as e:
+        print(f"⚠️  Model preload failed: {e}")
+
+
+# Filled in once per query with the retrieved context and the user's question
+RAG_PROMPT_TEMPLATE = """You are a legal AI assistant with access to evidence documents.
 
 EVIDENCE CONTEXT:
 {context}
@@ -159,7 +346,7 @@ EVIDENCE CONTEXT:
 ---
 
 USER QUESTION:
-{prompt}
+{question}
 
 ---
 
@@ -169,52 +356,185 @@ INSTRUCTIONS:
 - If the evidence doesn't contain relevant information, say so and provide general legal knowledge
 - Be precise and professional
 - Format your response clearly with bullet points where appropriate"""
-            except Exception as e:
-                print(f"RAG search error: {e}")
+
+
+def build_rag_prompt(prompt):
+    """Wrap the prompt with matching evidence excerpts; returns (prompt, sources)"""
+    sources = []
+    # One reference for the whole search: ingestion swaps in a new store, never edits this one
+    db = rag_system if init_rag_system() else None
+    if db is not None:
+        try:
+            # Search for relevant documents
+            # MiniLM is uncased, so lowercasing and collapsing whitespace keeps the vector
+            query_vector = embed_query_cached(" ".join(prompt.lower().split()))
+            try:
+                # MMR: take the 3 most relevant of the top 30 while skipping near-duplicate
+                # excerpts, so the model doesn't see (and cite) the same passage twice
+                docs = db.max_marginal_relevance_search_by_vector(
+                    list(query_vector), k=3, fetch_k=30, lambda_mult=0.5
+                )
+            except RuntimeError:
+                # IVF indexes built without a direct map can't return vectors for re-ranking
+                docs = db.similarity_search_by_vector(list(query_vector), k=3)
+            if docs:
+                sources = [doc.metadata.get('source', 'Unknown') for doc in docs]
+                context = "\n\n---\n\n".join(
+                    f"[Source {i}: {source}]\n{doc.page_content}"
+                    for i, (source, doc) in enumerate(zip(sources, docs), 1)
+                )
+                
+                # Enhance prompt with context
+                prompt = RAG_PROMPT_TEMPLATE.format(context=context, question=prompt)
+        except Exception as e:
+            print(f"RAG search error: {e}")
+    return prompt, sources
+
+
+def format_sources(sources):
+    """Sources footer appended to RAG answers"""
+    return f"\n\n---\n📚 **Sources**: {', '.join(set(sources))}"
+
+
+def query_ollama(prompt, use_rag=True):
+    """Query Ollama with optional RAG enhancement"""
+    try:
+        # Check if Ollama is running
+        if not check_ollama_running():
+            return "Error: Ollama server is not running. Please start it with: ollama serve"
+        
+        # RAG Enhancement
+        sources = []
+        if use_rag:
+            prompt, sources = build_rag_prompt(prompt)
         
-        # Query Ollama
-        result = subprocess.run(
-            [str(OLLAMA_BIN), "run", MODEL_NAME, prompt],
-            capture_output=True,
-            text=True,
-            timeout=90  # Increased timeout for RAG queries
+        # Query Ollama over HTTP (no process spawn per prompt)
+        result = ollama_session.post(
+            f"{OLLAMA_URL}/api/generate",
+            json={
+                "model": MODEL_NAME,
+                "prompt": prompt,
+                "stream": False,
+                "keep_alive": OLLAMA_KEEP_ALIVE
+            },
+            timeout=OLLAMA_TIMEOUT  # Increased read timeout for RAG queries
         )
         
-        if result.returncode == 0:
-            response = result.stdout.strip()
+        if result.status_code == 200:
+            response = result.json().get("response", "").strip()
             if sources:
                 # Append sources to response
-                response += f"\n\n---\n📚 **Sources**: {', '.join(set(sources))}"
+                response += format_sources(sources)
             return response
         else:
-            return f"Error: {result.stderr.strip()}"
+            return f"Error: {result.text.strip()}"
     
-    except subprocess.TimeoutExpired:
+    except requests.Timeout:
         return "Error: AI response timed out (90 seconds). Try a shorter query."
-    except FileNotFoundError:
-        return f"Error: Ollama not found at {OLLAMA_BIN}. Please check installation."
+    except requests.ConnectionError:
+        return f"Error: Cannot reach Ollama at {OLLAMA_URL}. Please start it with: ollama serve"
     except Exception as e:
         return f"Error: {str(e)}"
 
 
-def save_conversation():
-    """Save current conversation to file"""
-    if not current_conversation:
-        return
-    
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    filename = CONVERSATION_DIR / f"conversation-{timestamp}.json"
+def stream_ollama(prompt, use_rag=True):
+    """Like query_ollama, but yields response text as Ollama generates it"""
+    try:
+        if not check_ollama_running():
+            yield "Error: Ollama server is not running. Please start it with: ollama serve"
+            return
+        
+        sources = []
+        if use_rag:
+            prompt, sources = build_rag_prompt(prompt)
+        
+        # timeout applies per read, so a long answer is fine as long as tokens keep coming
+        with ollama_session.post(
+            f"{OLLAMA_URL}/api/generate",
+            json={
+                "model": MODEL_NAME,
+                "prompt": prompt,
+                "stream": True,
+                "keep_alive": OLLAMA_KEEP_ALIVE
+            },
+            stream=True,
+            timeout=OLLAMA_TIMEOUT
+        ) as result:
+            if result.status_code != 200:
+                yield f"Error: {result.text.strip()}"
+                return
+            for line in result.iter_lines():
+                if line:
+                    chunk = json_loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+        
+        if sources:
+            yield format_sources(sources)
     
+    except requests.Timeout:
+        yield "Error: AI response timed out (90 seconds). Try a shorter query."
+    except requests.ConnectionError:
+        yield f"Error: Cannot reach Ollama at {OLLAMA_URL}. Please start it with: ollama serve"
+    except Exception as e:
+        yield f"Error: {str(e)}"
+
+
+def append_messages(filename, messages):
+    """Append messages to a conversation log, one JSON object per line"""
     try:
-        with open(filename, "w") as f:
-            json.dump({
-                "timestamp": datetime.now().isoformat(),
-                "messages": current_conversation
-            }, f, indent=2)
+        with open(filename, "ab") as f:
+            f.write(b"".join(map(json_line, messages)))
     except Exception as e:
         print(f"Failed to save conversation: {e}")
 
 
+def new_session():
+    """Create empty conversation state for a session"""
+    # The log is named up front (created on first append) so concurrent turns
+    # in one session can't race to pick two different files
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    log_file = CONVERSATION_DIR / f"conversation-{timestamp}-{uuid.uuid4().hex[:8]}.jsonl"
+    return {"messages": deque(maxlen=MAX_HISTORY), "log_file": log_file}
+
+
+def get_session(create=True):
+    """Return the requesting browser's conversation state (None if it has none and create is False)"""
+    sid = request.cookies.get("session_id")
+    with sessions_lock:
+        session = sessions.get(sid) if sid else None
+        if session is not None:
+            sessions.move_to_end(sid)
+            return session
+        if not create:
+            return None
+        
+        if not sid:
+            sid = uuid.uuid4().hex
+            g.new_session_id = sid
+        session = sessions[sid] = new_session()
+        while len(sessions) > MAX_SESSIONS:
+            sessions.popitem(last=False)
+        return session
+
+
+def save_conversation(session, messages):
+    """Queue new messages for the session's JSONL log"""
+    if not messages:
+        return
+    
+    log_executor.submit(append_messages, session["log_file"], messages)
+
+
+@app.after_request
+def set_session_cookie(response):
+    """Hand a session_id cookie to browsers that don't have one yet"""
+    sid = g.get("new_session_id")
+    if sid:
+        response.set_cookie("session_id", sid, httponly=True, samesite="Lax")
+    return response
+
+
 @app.route("/")
 def index():
     """Serve main interface"""
@@ -230,42 +550,84 @@ def api_query():
     if not user_message:
         return jsonify({"error": "Empty message"}), 400
     
-    # Add user message to conversation
-    current_conversation.append({
+    session = get_session()
+    
+    # User message for this turn
+    user_entry = {
         "role": "user",
         "content": user_message,
         "timestamp": datetime.now().isoformat()
-    })
+    }
+    session["messages"].append(user_entry)
     
     # Query AI
     ai_response = query_ollama(user_message)
     
     # Add AI response to conversation
-    current_conversation.append({
+    ai_entry = {
         "role": "assistant",
         "content": ai_response,
         "timestamp": datetime.now().isoformat()
-    })
+    }
+    session["messages"].append(ai_entry)
     
-    # Save conversation
-    save_conversation()
+    # Log only this turn's two messages
+    save_conversation(session, [user_entry, ai_entry])
     
     return jsonify({
         "response": ai_response,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": ai_entry["timestamp"]
     })
 
 
+@app.route("/api/query/stream", methods=["POST"])
+def api_query_stream():
+    """Handle AI query requests, streaming tokens as Server-Sent Events"""
+    data = request.json
+    user_message = data.get("message", "").strip()
+    
+    if not user_message:
+        return jsonify({"error": "Empty message"}), 400
+    
+    session = get_session()
+    
+    user_entry = {
+        "role": "user",
+        "content": user_message,
+        "timestamp": datetime.now().isoformat()
+    }
+    session["messages"].append(user_entry)
+    
+    def events():
+        parts = []
+        try:
+            for token in stream_ollama(user_message):
+                parts.append(token)
+                yield f"data: {json_dumps({'token': token})}\n\n"
+        finally:
+            # Record whatever was generated, even if the browser disconnected mid-stream
+            ai_entry = {
+                "role": "assistant",
+                "content": "".join(parts).strip(),
+                "timestamp": datetime.now().isoformat()
+            }
+            session["messages"].append(ai_entry)
+            save_conversation(session, [user_entry, ai_entry])
+        
+        yield f"data: {json_dumps({'done': True, 'timestamp': ai_entry['timestamp']})}\n\n"
+    
+    return Response(stream_with_context(events()), mimetype="text/event-stream")
+
+
 @app.route("/api/clear", methods=["POST"])
 def api_clear():
     """Clear current conversation"""
-    global current_conversation
+    session = get_session(create=False)
     
-    # Save before clearing
-    save_conversation()
-    
-    # Clear conversation
-    current_conversation = []
+    # Every message is already logged; start a new log file for the next session
+    if session is not None:
+        session["messages"].clear()
+        session["log_file"] = new_session()["log_file"]
     
     return jsonify({"status": "cleared"})
 
@@ -275,34 +637,45 @@ def api_status():
     """Check system status"""
     ollama_running = check_ollama_running()
     ollama_exists = OLLAMA_BIN.exists()
+    session = get_session(create=False)  # polling must not mint sessions
     
     # Check RAG status
     rag_available = False
-    document_count = 0
+    doc_count = 0
     if VECTOR_DB_DIR.exists():
         rag_available = (VECTOR_DB_DIR / "index.faiss").exists()
-        if EVIDENCE_DIR.exists():
-            document_count = len(list(EVIDENCE_DIR.glob("**/*.*")))
+        doc_count = document_count()
     
     return jsonify({
         "ollama_running": ollama_running,
         "ollama_exists": ollama_exists,
         "ollama_path": str(OLLAMA_BIN),
         "model": MODEL_NAME,
-        "conversation_count": len(current_conversation) // 2,
+        "conversation_count": len(session["messages"]) // 2 if session else 0,
         "rag_available": rag_available,
-        "document_count": document_count
+        "document_count": doc_count
     })
 
 
 @app.route("/api/history", methods=["GET"])
 def api_history():
     """Return current conversation history"""
+    session = get_session(create=False)
     return jsonify({
-        "messages": current_conversation
+        "messages": list(session["messages"]) if session else []
     })
 
 
+@app.errorhandler(413)
+def upload_too_large(e):
+    """JSON error for request bodies over MAX_CONTENT_LENGTH"""
+    size_mb = (request.content_length or 0) / (1024 * 1024)
+    return jsonify({
+        "success": False,
+        "error": f"File too large ({size_mb:.1f}MB). Maximum size: 50MB"
+    }), 413
+
+
 @app.route("/api/upload", methods=["POST"])
 def api_upload():
     """Handle document upload and ingestion"""
@@ -314,10 +687,10 @@ def api_upload():
         return jsonify({"success": False, "error": "No file selected"}), 400
     
     # Check file extension
-    if '.' not in file.filename:
+    ext = Path(file.filename).suffix[1:].lower()
+    if not ext:
         return jsonify({"success": False, "error": "Invalid file type - no extension found"}), 400
     
-    ext = file.filename.rsplit('.', 1)[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
         return jsonify({
             "success": False,
@@ -325,32 +698,38 @@ def api_upload():
         }), 400
     
     try:
-        # Check file size
-        file.seek(0, 2)  # Seek to end
-        file_size = file.tell()
-        file.seek(0)  # Reset to beginning
-        
-        if file_size > MAX_FILE_SIZE:
-            size_mb = file_size / (1024 * 1024)
-            return jsonify({
-                "success": False,
-                "error": f"File too large ({size_mb:.1f}MB). Maximum size: 50MB"
-            }), 400
-        
-        # Save file to uploads directory
-        filename = secure_filename(file.filename)
-        filepath = UPLOAD_DIR / filename
-        
-        # Check if file already exists
-        if filepath.exists():
-            base, extension = filename.rsplit('.', 1)
-            counter = 1
-            while filepath.exists():
-                filename = f"{base}_{counter}.{extension}"
-                filepath = UPLOAD_DIR / filename
-                counter += 1
-        
-        file.save(str(filepath))
+        # Stream the upload to a scratch file in 1 MiB blocks, hashing as it goes
+        digest = hashlib.blake2b(digest_size=8)
+        part_path = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=UPLOAD_TMP_DIR, suffix=".part", delete=False) as out:
+                part_path = Path(out.name)
+                for block in iter(lambda: file.stream.read(1 << 20), b""):
+                    digest.update(block)
+                    out.write(block)
+                file_size = out.tell()
+            
+            if file_size > MAX_FILE_SIZE:
+                size_mb = file_size / (1024 * 1024)
+                return jsonify({
+                    "success": False,
+                    "error": f"File too large ({size_mb:.1f}MB). Maximum size: 50MB"
+                }), 400
+            
+            # Duplicates are found by content alone; the digest in the stored
+            # name lets the lookup be rebuilt from the directory after a restart
+            with upload_lock:
+                filepath = find_upload(digest.hexdigest())
+                duplicate = filepath is not None
+                if not duplicate:
+                    base = secure_filename(file.filename).rpartition('.')[0] or "upload"
+                    filepath = UPLOAD_DIR / f"{base}.{digest.hexdigest()}.{ext}"
+                    shutil.move(part_path, filepath)
+                    upload_digests[digest.hexdigest()] = filepath
+        finally:
+            if part_path is not None:
+                part_path.unlink(missing_ok=True)
+        filename = filepath.name
         
         # Format file size for response
         if file_size < 1024:
@@ -360,17 +739,46 @@ def api_upload():
         else:
             size_str = f"{file_size / (1024 * 1024):.1f} MB"
         
-        # Trigger re-ingestion
-        ingestion_success = ingest_documents()
+        if duplicate:
+            state = file_ingest_state.get(filepath)
+            if state == "queued":
+                return jsonify({
+                    "success": True,
+                    "status": "queued",
+                    "filename": filename,
+                    "size": size_str,
+                    "message": "✅ File already uploaded - still indexing for AI search in the background"
+                }), 202
+            if state == "indexed" or (state is None and is_indexed(filepath)):
+                return jsonify({
+                    "success": True,
+                    "status": "duplicate",
+                    "filename": filename,
+                    "size": size_str,
+                    "message": "✅ File already uploaded - it is indexed for AI search"
+                })
+            
+            # The earlier ingest failed (or never ran before a restart): try it again
+            queue_ingest(filepath)
+            return jsonify({
+                "success": True,
+                "status": "queued",
+                "filename": filename,
+                "size": size_str,
+                "message": "✅ File already uploaded but not indexed - indexing it again in the background"
+            }), 202
         
-        message = "✅ File uploaded and indexed for AI search" if ingestion_success else "✅ File uploaded (indexing may have failed)"
+        # Index in the background; the response doesn't wait for embedding
+        queue_ingest(filepath)
+        _doc_count_cache["t"] = 0.0  # the next status poll recounts
         
         return jsonify({
             "success": True,
+            "status": "queued",
             "filename": filename,
             "size": size_str,
-            "message": message
-        })
+            "message": "✅ File uploaded - indexing for AI search in the background"
+        }), 202
     except Exception as e:
         print(f"Upload error: {e}")
         return jsonify({
@@ -379,83 +787,271 @@ def api_upload():
         }), 500
 
 
+@app.route("/api/ingest_status", methods=["GET"])
+def api_ingest_status():
+    """Report background indexing progress"""
+    return jsonify({
+        "queued": ingest_queue.qsize(),
+        "last_completed": ingest_state["last_completed"],
+        "last_success": ingest_state["last_success"],
+        "failed": [path.name for path, state in list(file_ingest_state.items()) if state == "failed"]
+    })
+
+
+@app.route("/api/reindex", methods=["POST"])
+def api_reindex():
+    """Rebuild the vector index from every evidence file"""
+    with ingest_lock:
+        success = ingest_documents()
+    return jsonify({"success": success})
+
+
 @app.route("/api/documents", methods=["GET"])
 def api_documents():
     """List all uploaded documents"""
     try:
         documents = []
-        if EVIDENCE_DIR.exists():
-            for filepath in EVIDENCE_DIR.glob("**/*.*"):
-                if filepath.is_file():
-                    documents.append({
-                        "name": filepath.name,
-                        "size": filepath.stat().st_size,
-                        "modified": datetime.fromtimestamp(filepath.stat().st_mtime).isoformat()
-                    })
+        for entry in iter_files(EVIDENCE_DIR):
+            stat = entry.stat()
+            documents.append({
+                "name": entry.name,
+                "size": stat.st_size,
+                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat()
+            })
         return jsonify({"documents": documents})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-def ingest_documents():
-    """Ingest all documents in evidence directory into vector database"""
+def build_vector_store(texts, metadatas, embeddings):
+    """Build the FAISS store: exact fp16 index for small corpora, IVF-PQ for large ones"""
+    import math
+    import faiss
+    from langchain.docstore.document import Document
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    
+    vectors = embed_documents_cached(texts, embeddings)
+    dim = vectors.shape[1]
+    
+    if len(texts) < IVF_MIN_CHUNKS:
+        # Brute-force search over half-width vectors: near-identical ranking, half the bytes
+        # scanned. fp16 needs no training, so vectors added by later uploads encode exactly
+        # (an 8-bit quantizer would clamp them to the first build's per-dimension range).
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16)
+        index.add(vectors)
+    else:
+        # Coarse clustering + product quantization: each search scans nprobe lists of codes
+        # 8-dim sub-vectors (48 one-byte codes for MiniLM) keep recall close to the flat index
+        nlist = min(256, 4 * int(math.sqrt(len(texts))))
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, dim // 8, 8)
+        index.train(vectors)
+        index.add(vectors)
+        index.make_direct_map()  # lets MMR reconstruct candidate vectors by id
+        index.nprobe = 16
+    
+    ids = [str(uuid.uuid4()) for _ in texts]
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=text, metadata=metadata)
+        for doc_id, text, metadata in zip(ids, texts, metadatas)
+    })
+    return FAISS(embeddings, index, docstore, dict(enumerate(ids)))
+
+
+def extract_chunks(filepath):
+    """Extract and split one evidence file's text (runs in a worker process)"""
     try:
-        import fitz  # PyMuPDF
-        from langchain_community.vectorstores import FAISS
-        from langchain_community.embeddings import HuggingFaceEmbeddings
         from langchain.text_splitter import RecursiveCharacterTextSplitter
         
-        embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
         splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        text = None
+        ext = filepath.suffix.lower()
         
-        docs = []
-        # Scan both evidence root and uploads subdirectory
-        for search_dir in [EVIDENCE_DIR, UPLOAD_DIR]:
-            if not search_dir.exists():
-                continue
-            for filepath in search_dir.glob("**/*.*"):
-                if not filepath.is_file():
-                    continue
-                
-                try:
-                    text = None
-                    ext = filepath.suffix.lower()
-                    
-                    if ext == '.pdf':
-                        pdf = fitz.open(str(filepath))
-                        text = '\n'.join(page.get_text() for page in pdf)
-                        pdf.close()
-                    elif ext in ['.txt', '.md']:
-                        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                            text = f.read()
-                    elif ext in ['.html', '.mhtml']:
-                        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                            text = f.read()
-                    # Skip image and zip files for now (no text extraction)
-                    
-                    if text and text.strip():
-                        chunks = splitter.split_text(text)
-                        for chunk in chunks:
-                            docs.append({
-                                "content": chunk,
-                                "metadata": {"source": filepath.name, "path": str(filepath)}
-                            })
-                except Exception as e:
-                    print(f"Error processing {filepath.name}: {e}")
+        if ext == '.pdf':
+            import fitz  # PyMuPDF
+            # A fitz Document is not thread-safe, so pages are read in order here;
+            # parallelism comes from the process pool running one file per worker.
+            # Splitting page by page never holds the whole document's text at once.
+            with fitz.open(str(filepath)) as pdf:
+                return [chunk for page in pdf for chunk in splitter.split_text(page.get_text("text"))]
+        elif ext in ['.txt', '.md']:
+            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        elif ext in ['.html', '.mhtml']:
+            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        # Skip image and zip files for now (no text extraction)
         
-        if docs:
-            texts = [d["content"] for d in docs]
-            metadatas = [d["metadata"] for d in docs]
-            
-            db = FAISS.from_texts(texts, embeddings, metadatas=metadatas)
-            db.save_local(str(VECTOR_DB_DIR))
+        if text and text.strip():
+            return splitter.split_text(text)
+    except Exception as e:
+        print(f"Error processing {filepath.name}: {e}")
+    return []
+
+
+def save_vector_store(db):
+    """Persist the FAISS store without truncating a live memory-mapped index"""
+    # Save beside the live index and swap the files in, so a memory-mapped
+    # index that is still being searched is never truncated underneath it
+    staging_dir = VECTOR_DB_DIR.with_name(VECTOR_DB_DIR.name + ".new")
+    db.save_local(str(staging_dir))
+    VECTOR_DB_DIR.mkdir(parents=True, exist_ok=True)
+    for name in ("index.faiss", "index.pkl"):
+        os.replace(staging_dir / name, VECTOR_DB_DIR / name)
+
+
+def clone_vector_store(db):
+    """Copy a FAISS store so it can be extended while searches keep using the original"""
+    import faiss
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    
+    return FAISS(
+        db.embedding_function,
+        faiss.clone_index(db.index),
+        InMemoryDocstore(dict(db.docstore._dict)),
+        dict(db.index_to_docstore_id)
+    )
+
+
+def dedupe_chunks(file_chunks, seen):
+    """Flatten (path, chunks) pairs into parallel text/metadata lists.
+
+    Repeated boilerplate (headers, footers, disclaimers) is kept once, under
+    its first source; seen holds the texts already taken and is updated.
+    """
+    texts = []
+    metadatas = []
+    for filepath, chunks in file_chunks:
+        metadata = {"source": filepath.name, "path": str(filepath)}
+        for chunk in chunks:
+            if chunk not in seen:
+                seen.add(chunk)
+                texts.append(chunk)
+                metadatas.append(dict(metadata))
+    return texts, metadatas
+
+
+def ingest_files(filepaths):
+    """Add newly uploaded files to the existing index (falls back to a full rebuild)"""
+    global rag_system
+    with ingest_lock:
+        if not init_rag_system():
+            # No index yet: the full pass builds it, including these files
+            return ingest_documents()
+        
+        # Skip chunks the index already holds as well as repeats within the batch
+        seen = {doc.page_content for doc in rag_system.docstore._dict.values()}
+        texts, metadatas = dedupe_chunks(
+            ((filepath, extract_chunks(filepath)) for filepath in filepaths), seen
+        )
+        if not texts:
+            return True
+        
+        try:
+            # Extend a copy: a FAISS add can reallocate the codes a concurrent search is
+            # reading, and a search could see ids the docstore doesn't have yet
+            vectors = embed_documents_cached(texts, get_embeddings())
+            db = clone_vector_store(rag_system)
+            db.add_embeddings(zip(texts, vectors.tolist()), metadatas=metadatas)
+            save_vector_store(db)
+        except Exception as e:
+            # e.g. a read-only memory-mapped IVF index
+            print(f"Incremental indexing failed ({e}), rebuilding index")
+            return ingest_documents()
+        
+        # Searches already running finish on the old store; new ones pick up this one
+        rag_system = db
+        
+        print(f"✅ Indexed {len(texts)} document chunks from {len(filepaths)} file(s)")
+        return True
+
+
+def queue_ingest(filepath):
+    """Hand an uploaded file to the background indexer"""
+    file_ingest_state[filepath] = "queued"
+    ingest_queue.put(filepath)
+
+
+def find_upload(digest):
+    """Stored upload with this content digest, or None (caller holds upload_lock)"""
+    global upload_digests
+    if upload_digests is None:
+        upload_digests = {}
+        for entry in iter_files(UPLOAD_DIR):
+            parts = entry.name.rsplit('.', 2)
+            if len(parts) == 3:
+                upload_digests.setdefault(parts[1], Path(entry.path))
+    path = upload_digests.get(digest)
+    if path is not None and not path.exists():
+        del upload_digests[digest]
+        return None
+    return path
+
+
+def is_indexed(filepath):
+    """Whether the live index holds chunks from this file (for files uploaded before a restart)"""
+    db = rag_system if init_rag_system() else None
+    if db is None:
+        return False
+    path = str(filepath)
+    return any(doc.metadata.get("path") == path for doc in db.docstore._dict.values())
+
+
+def ingest_worker():
+    """Index queued uploads off the request threads, one burst at a time"""
+    while True:
+        filepaths = [ingest_queue.get()]
+        # Drain whatever else arrived meanwhile so a burst of uploads shares one index save
+        while True:
+            try:
+                filepaths.append(ingest_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        try:
+            success = ingest_files(list(dict.fromkeys(filepaths)))
+        except Exception as e:
+            print(f"Ingestion error: {e}")
+            success = False
+        ingest_state["last_completed"] = datetime.now().isoformat()
+        ingest_state["last_success"] = success
+        for filepath in filepaths:
+            file_ingest_state[filepath] = "indexed" if success else "failed"
+        for _ in filepaths:
+            ingest_queue.task_done()
+
+
+threading.Thread(target=ingest_worker, daemon=True).start()
+
+
+def ingest_documents():
+    """Ingest all documents in evidence directory into vector database"""
+    try:
+        # One walk of the evidence tree; it already includes the uploads subdirectory
+        files = [Path(entry.path) for entry in iter_files(EVIDENCE_DIR)]
+        
+        # Extraction is independent per file: fan it out across CPU cores. Workers are
+        # spawned, not forked - forking the threaded server can copy a held lock.
+        if len(files) > 1:
+            with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = list(pool.map(extract_chunks, files, chunksize=4))
+        else:
+            results = [extract_chunks(filepath) for filepath in files]
+        
+        # Parallel lists, embedded in one batched pass below
+        texts, metadatas = dedupe_chunks(zip(files, results), set())
+        
+        if texts:
+            # Load the embedding model only once extraction is done
+            db = build_vector_store(texts, metadatas, get_embeddings())
+            save_vector_store(db)
             
-            # Reload RAG system
+            # Serve searches from the index just built instead of reloading it from disk
             global rag_system
-            rag_system = None
-            init_rag_system()
+            rag_system = db
             
-            print(f"✅ Indexed {len(docs)} document chunks from {len(list(EVIDENCE_DIR.glob('**/*.*')))} files")
+            print(f"✅ Indexed {len(texts)} document chunks from {len(files)} files")
             return True
         return False
     except Exception as e:
@@ -487,9 +1083,14 @@ if __name__ == "__main__":
             print("❌ Failed to start Ollama server")
             print("   Manual start: ollama serve")
     
+    # Warm the model in the background so the first query doesn't pay the load
+    if check_ollama_running():
+        threading.Thread(target=warm_ollama, daemon=True).start()
+    
     # Check RAG status
+    limit_compute_threads()
     if init_rag_system():
-        doc_count = len(list(EVIDENCE_DIR.glob("**/*.*"))) if EVIDENCE_DIR.exists() else 0
+        doc_count = document_count()
         print(f"✅ RAG system loaded ({doc_count} documents indexed)")
     else:
         print("⚠️  RAG system not available - upload documents to enable")
@@ -510,5 +1111,10 @@ if __name__ == "__main__":
     print()
     print("=" * 80)
     
-    # Run Flask app
-    app.run(host="0.0.0.0", port=8080, debug=False)
+    # Run Flask app - on the waitress production server when installed.
+    # One process with a thread pool: sessions live in this process's memory.
+    try:
+        from waitress import serve
+        serve(app, host="0.0.0.0", port=8080, threads=OLLAMA_NUM_PARALLEL)
+    except ImportError:
+        app.run(host="0.0.0.0", port=8080, debug=False, threaded=True)